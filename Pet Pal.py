@@ -1,33 +1,35 @@
+import time
+STARTED_AT = time.perf_counter()  # For reporting the time to the first frame
+
 import pygame
 import os
 import sys
 from pet import Pet  # Make sure pet.py exists with a Pet class
-from dotenv import load_dotenv
-from openai import OpenAI
-
-# Load environment variables
-load_dotenv()
-
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+from speech_worker import SpeechWorker
+from text_cache import TextCache
+from dirty_rects import DirtyRegions
+from scene_layers import SceneLayers
+from sim_clock import SimulationClock
+from savefile import SaveGame
+from profiler import FrameProfiler
+from assets import AssetManager
+from input_log import InputRecorder
+from frame_pacer import FramePacer
+from pet_client import PetClient
+from ai_messages import generate_ai_message, generate_streamed_ai_message, message_cache, ai_health, AI_LATENCY_BUDGET
 
 # Initialize Pygame
 pygame.init()
 
-# Load sounds
-current_dir = os.path.dirname(__file__)
-bark_sound = pygame.mixer.Sound(os.path.join(current_dir, "assets", "bark.mp3"))
-
-# Load and start background music
-pygame.mixer.music.load(os.path.join(current_dir, "assets", "music-for-game-fun-kid-game-163649.mp3"))
-pygame.mixer.music.set_volume(0.3)  # Set volume to 30% so it's not too loud
-pygame.mixer.music.play(-1)  # Play indefinitely (-1 means loop forever)
-
 # Screen setup
 WIDTH, HEIGHT = 1500, 1000
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Pet Pal")
 
+# Full frame rate while the screen changes, a few frames a second when it doesn't.
+# Sleeps in pygame.event.wait, so input (and finished AI speech) wakes the loop right away.
+pacer = FramePacer()
+
 # Game state
 LANDING = 0
 TUTORIAL = 1
@@ -40,108 +42,108 @@ title_font = pygame.font.Font(None, 72)
 button_font = pygame.font.Font(None, 48)
 tutorial_font = pygame.font.Font(None, 32)
 
+# Rendered text is reused across frames until it changes
+text_cache = TextCache()
+
+# Only the parts of the screen that changed get redrawn and presented
+dirty_regions = DirtyRegions()
+
+# Static parts of each screen, composed once and reused every frame
+scene_layers = SceneLayers()
+
+# Per-phase frame timings. F3 toggles the overlay; PETPAL_PROFILE=<file.json> records from the start
+# and writes a summary there plus a Chrome trace next to it on exit.
+PROFILE_PATH = os.getenv("PETPAL_PROFILE")
+profiler = FrameProfiler(enabled=bool(PROFILE_PATH))
+profiler_rect = pygame.Rect(WIDTH - 400, 20, 380, 250)
+
 # Asset path setup
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSET_PATH = os.path.join(BASE_DIR, "assets")
 
-# Load and scale background images
-landing_bg_path = os.path.join(ASSET_PATH, "landing.jpg")
-landing_background = pygame.image.load(landing_bg_path)
-landing_background = pygame.transform.scale(landing_background, (WIDTH, HEIGHT))
-
-game_bg_path = os.path.join(ASSET_PATH, "bg.png")
-game_background = pygame.image.load(game_bg_path)
-game_background = pygame.transform.scale(game_background, (WIDTH, HEIGHT))
-
-# Load and scale pet image to a reasonable size
-pet_img_path = os.path.join(ASSET_PATH, "pet_happy-.png")
-pet_img = pygame.image.load(pet_img_path).convert()
-pet_img.set_colorkey((255, 255, 255))  # Make white background transparent
-pet_img = pygame.transform.scale(pet_img, (300, 300))  # Made bigger from (200, 200)
-
-# Load action button images
-feed_img_path = os.path.join(ASSET_PATH, "feed.jpg")
-play_img_path = os.path.join(ASSET_PATH, "play.jpg")
-sleep_img_path = os.path.join(ASSET_PATH, "sleep.jpg")
-
-feed_img = pygame.image.load(feed_img_path).convert()
-feed_img.set_colorkey((255, 255, 255))  # Make white transparent
-
-play_img = pygame.image.load(play_img_path).convert()
-play_img.set_colorkey((255, 255, 255))
-
-sleep_img = pygame.image.load(sleep_img_path).convert()
-sleep_img.set_colorkey((255, 255, 255))
-
-
-# Scale action buttons to consistent size
-button_size = (100, 100)
-feed_img = pygame.transform.scale(feed_img, button_size)
-play_img = pygame.transform.scale(play_img, button_size)
-sleep_img = pygame.transform.scale(sleep_img, button_size)
-
-# Load star image for congratulations popup
-star_img_path = os.path.join(ASSET_PATH, "star.png")
-star_img = pygame.image.load(star_img_path)
-star_img = pygame.transform.scale(star_img, (40, 40))  # Scale to appropriate size
-
-
-# AI Message Generation
-def generate_ai_message(mood, hunger, energy, happiness, recent_action=None):
-    try:
-        # Create context for the AI
-        context = f"You are a cute virtual pet. Your current stats are: Hunger: {hunger:.1f}, Energy: {energy:.1f}, Happiness: {happiness:.1f}. Your mood is: {mood}."
-
-        if recent_action:
-            context += f" Your owner just {recent_action}."
-
-        prompt = f"{context} Respond with a short, cute message (max 7 words) that reflects how you're feeling. Use simple, friendly language limited to alphanumerical text, no emojis."
-
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system",
-                 "content": "You are a cute virtual pet who speaks in short, adorable messages.  Use simple, friendly language limited to alphanumerical text, no emojis."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=50,
-            temperature=0.8
-        )
-
-        # Get response and filter out emojis/special characters
-        message = response.choices[0].message.content.strip()
-        # Keep only alphanumeric characters, spaces, punctuation, and basic symbols
-        filtered_message = ''.join(char for char in message if ord(char) < 256)
-        return filtered_message
-    except Exception as e:
-        print(f"AI message generation failed: {e}")
-        # Fallback to static messages
-        fallback_messages = {
-            "hungry": "I'm so hungry! :(",
-            "tired": "I need a nap...",
-            "sad": "I'm feeling lonely... :'(",
-            "excited": "This is amazing!",
-            "happy": "I'm feeling great! :DDD"
-        }
-        return fallback_messages.get(mood, "Hello! :)")
+# Images and sounds are decoded on background threads, and scaled images are cached on disk for the next start
+assets = AssetManager(ASSET_PATH, cache_dir=os.getenv("PETPAL_ASSET_CACHE", os.path.join(BASE_DIR, ".asset_cache")))
+
+# The landing page is all the first frame needs, so only its background is loaded up front
+LANDING_IMAGE = ("landing_background", "landing.jpg", (WIDTH, HEIGHT), None, False)
+landing_background = assets.load_image(*LANDING_IMAGE)
+
+# The rest loads while the landing page is showing: (name, file, size, colorkey, alpha)
+button_size = (100, 100)  # Action buttons, scaled to a consistent size
+GAME_IMAGES = (
+    ("game_background", "bg.png", (WIDTH, HEIGHT), None, False),
+    ("pet", "pet_happy-.png", (300, 300), (255, 255, 255), False),  # Make white background transparent
+    ("feed", "feed.jpg", button_size, (255, 255, 255), False),
+    ("play", "play.jpg", button_size, (255, 255, 255), False),
+    ("sleep", "sleep.jpg", button_size, (255, 255, 255), False),
+    ("star", "star.png", (40, 40), None, True),  # Star image for congratulations popup
+)
+GAME_SOUNDS = (("bark", "bark.mp3"),)
+for image in GAME_IMAGES:
+    assets.request_image(*image)
+for sound in GAME_SOUNDS:
+    assets.request_sound(*sound)
+
+# Load and start background music
+def start_music():
+    pygame.mixer.music.load(os.path.join(ASSET_PATH, "music-for-game-fun-kid-game-163649.mp3"))
+    pygame.mixer.music.set_volume(0.3)  # Set volume to 30% so it's not too loud
+    pygame.mixer.music.play(-1)  # Play indefinitely (-1 means loop forever)
+
+assets.background(start_music)
+
+
+# Runs generate_ai_message in the background so the window never freezes on the network.
+# Replies stream into the bubble as they arrive; PETPAL_STREAM=0 waits for whole replies instead.
+speech_worker = SpeechWorker(generate_ai_message, timeout=AI_LATENCY_BUDGET, cache=message_cache,
+                             stream_func=None if os.getenv("PETPAL_STREAM") == "0" else generate_streamed_ai_message,
+                             on_ready=pacer.wake)
+
+# PETPAL_SERVER=host:port turns the game into a thin client of pet_server.py: the server owns
+# the pet and the game only sends actions and draws the state it gets back
+SERVER_ADDRESS = os.getenv("PETPAL_SERVER")
+pet_client = PetClient(SERVER_ADDRESS, os.getenv("PETPAL_PLAYER", "player")) if SERVER_ADDRESS else None
+CLIENT_POLL_INTERVAL = 0.1  # Seconds between checks for server updates while the loop is idle
+DISCONNECTED_TEXT = "Lost connection to the server"
+server_connected = True  # What pet_client.poll() last said; the pet stays as last seen once it's False
 
 # Game restart function
 def restart_game():
     global pet, current_state
-    pet = Pet()  # Create new pet with fresh stats
+    if pet_client is not None:
+        pet_client.send("restart")
+    else:
+        speech_worker.forget(pet)
+        pet = Pet()  # Create new pet with fresh stats
+        save_game.record(0, pet, "restart")
     current_state = LANDING  # Go back to landing page
 
+# Pet state is saved between runs: actions are journaled, the full state is written on exit
+save_game = SaveGame(os.getenv("PETPAL_SAVE", os.path.join(BASE_DIR, "petpal.sav")))
+
+def load_pet():
+    saved = save_game.load(0)
+    if saved is None:
+        return Pet()
+    saved_pet, updated_at = saved
+    saved_pet.advance(max(0.0, time.time() - updated_at))  # Catch up on the time the game was closed
+    return saved_pet
+
 # Pet instance
-pet = Pet()
+pet = load_pet() if pet_client is None else pet_client.pet
 
 # Clock
-clock = pygame.time.Clock()
+sim_clock = SimulationClock()  # Paces the pet, in real time whatever the frame rate
 
 # Draw pet stats on screen
 def draw_stat(label, value, y_pos):
-    text = font.render(f"{label}: {int(value)}", True, (0, 0, 0))
+    text = text_cache.render(font, f"{label}: {int(value)}", (0, 0, 0))
     screen.blit(text, (20, y_pos))
 
+def speech_bubble_area(pet_x, pet_y):
+    # Screen area covered by the speech bubble, its tail and borders
+    return pygame.Rect(pet_x + 150 - 300, pet_y - 140, 600, 150 + 20).inflate(6, 6)
+
 def draw_speech_bubble(pet_x, pet_y):
     if pet.speech_bubble_timer > 0:
         # Calculate bubble position (above the pet) - Made bigger for AI messages
@@ -164,91 +166,76 @@ def draw_speech_bubble(pet_x, pet_y):
         pygame.draw.polygon(screen, (255, 255, 255), tail_points)
         pygame.draw.polygon(screen, (0, 0, 0), tail_points, 3)
 
-        # Draw text inside bubble (with better text handling)
-        text_lines = []
-        words = pet.speech_bubble_text.split(' ')
-        current_line = ""
-
-        # Simple word wrapping for longer AI messages
-        for word in words:
-            test_line = current_line + word + " "
-            test_surface = tutorial_font.render(test_line, True, (0, 0, 0))
-            if test_surface.get_width() > bubble_width - 20:  # Leave 20px padding
-                if current_line:
-                    text_lines.append(current_line.strip())
-                    current_line = word + " "
-                else:
-                    text_lines.append(word)
-                    current_line = ""
-            else:
-                current_line = test_line
-
-        if current_line:
-            text_lines.append(current_line.strip())
+        # Draw text inside bubble (wrapped once per message, then reused)
+        text_lines = text_cache.wrap(tutorial_font, pet.speech_bubble_text, (0, 0, 0), bubble_width - 20)  # Leave 20px padding
 
         # Draw each line of text
         line_height = 25
         start_y = bubble_y + bubble_height // 2 - (len(text_lines) * line_height) // 2
 
-        for i, line in enumerate(text_lines):
-            line_surface = tutorial_font.render(line, True, (0, 0, 0))
+        for i, line_surface in enumerate(text_lines):
             line_rect = line_surface.get_rect(center=(bubble_x + bubble_width // 2, start_y + i * line_height))
             screen.blit(line_surface, line_rect)
 
-def draw_congratulations_popup():
-    if pet.congrats_popup_timer > 0:
-        # Create semi-transparent overlay
-        overlay = pygame.Surface((WIDTH, HEIGHT))
-        overlay.set_alpha(150)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
-
-        # Draw main popup box
-        popup_width = 600
-        popup_height = 300
-        popup_x = (WIDTH - popup_width) // 2
-        popup_y = (HEIGHT - popup_height) // 2
-
-        # Popup background with border
-        pygame.draw.rect(screen, (255, 215, 0), (popup_x, popup_y, popup_width, popup_height))  # Gold background
-        pygame.draw.rect(screen, (255, 255, 255), (popup_x, popup_y, popup_width, popup_height), 5)  # White border
-
-        # Main congratulations text
-        congrats_text = title_font.render("CONGRATULATIONS!", True, (255, 255, 255))
-        congrats_rect = congrats_text.get_rect(center=(WIDTH // 2, popup_y + 80))
-        screen.blit(congrats_text, congrats_rect)
-
-        # Subtitle text
-        subtitle_text = button_font.render("Max Friendship Achieved!", True, (255, 255, 255))
-        subtitle_rect = subtitle_text.get_rect(center=(WIDTH // 2, popup_y + 140))
-        screen.blit(subtitle_text, subtitle_rect)
-
-        # Additional message
-        message_text = tutorial_font.render("Your pet loves you very much!", True, (255, 255, 255))
-        message_rect = message_text.get_rect(center=(WIDTH // 2, popup_y + 180))
-        screen.blit(message_text, message_rect)
-
-        # Stars decoration
-        star_positions = [
-            (popup_x + 50, popup_y + 50),
-            (popup_x + popup_width - 50, popup_y + 50),
-            (popup_x + 50, popup_y + popup_height - 50),
-            (popup_x + popup_width - 50, popup_y + popup_height - 50),
-            (popup_x + popup_width // 2, popup_y + 30),
-            (popup_x + popup_width // 2, popup_y + popup_height - 30)
-        ]
+def build_popup_layer(size):
+    # Semi-transparent overlay, the popup itself is opaque
+    layer = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+    layer.fill((0, 0, 0, 150))
+
+    # Draw main popup box
+    popup_width = 600
+    popup_height = 300
+    popup_x = (WIDTH - popup_width) // 2
+    popup_y = (HEIGHT - popup_height) // 2
+
+    # Popup background with border
+    pygame.draw.rect(layer, (255, 215, 0), (popup_x, popup_y, popup_width, popup_height))  # Gold background
+    pygame.draw.rect(layer, (255, 255, 255), (popup_x, popup_y, popup_width, popup_height), 5)  # White border
+
+    # Main congratulations text
+    congrats_text = text_cache.render(title_font, "CONGRATULATIONS!", (255, 255, 255))
+    congrats_rect = congrats_text.get_rect(center=(WIDTH // 2, popup_y + 80))
+    layer.blit(congrats_text, congrats_rect)
+
+    # Subtitle text
+    subtitle_text = text_cache.render(button_font, "Max Friendship Achieved!", (255, 255, 255))
+    subtitle_rect = subtitle_text.get_rect(center=(WIDTH // 2, popup_y + 140))
+    layer.blit(subtitle_text, subtitle_rect)
+
+    # Additional message
+    message_text = text_cache.render(tutorial_font, "Your pet loves you very much!", (255, 255, 255))
+    message_rect = message_text.get_rect(center=(WIDTH // 2, popup_y + 180))
+    layer.blit(message_text, message_rect)
+
+    # Stars decoration
+    star_positions = [
+        (popup_x + 50, popup_y + 50),
+        (popup_x + popup_width - 50, popup_y + 50),
+        (popup_x + 50, popup_y + popup_height - 50),
+        (popup_x + popup_width - 50, popup_y + popup_height - 50),
+        (popup_x + popup_width // 2, popup_y + 30),
+        (popup_x + popup_width // 2, popup_y + popup_height - 30)
+    ]
+
+    star_img = assets.get("star")
+    for star_x, star_y in star_positions:
+        star_rect = star_img.get_rect(center=(star_x, star_y))
+        layer.blit(star_img, star_rect)
+
+    # Draw Play Again button
+    pygame.draw.rect(layer, (100, 200, 100), play_again_button_rect)  # Green button
+    pygame.draw.rect(layer, (255, 255, 255), play_again_button_rect, 3)  # White border
 
-        for star_x, star_y in star_positions:
-            star_rect = star_img.get_rect(center=(star_x, star_y))
-            screen.blit(star_img, star_rect)
+    play_again_text = text_cache.render(button_font, "PLAY AGAIN", (255, 255, 255))
+    play_again_text_rect = play_again_text.get_rect(center=play_again_button_rect.center)
+    layer.blit(play_again_text, play_again_text_rect)
 
-        # Draw Play Again button
-        pygame.draw.rect(screen, (100, 200, 100), play_again_button_rect)  # Green button
-        pygame.draw.rect(screen, (255, 255, 255), play_again_button_rect, 3)  # White border
+    return layer
 
-        play_again_text = button_font.render("PLAY AGAIN", True, (255, 255, 255))
-        play_again_text_rect = play_again_text.get_rect(center=play_again_button_rect.center)
-        screen.blit(play_again_text, play_again_text_rect)
+
+def draw_congratulations_popup():
+    if pet.congrats_popup_timer > 0:
+        screen.blit(scene_layers.get("popup", screen.get_size()), (0, 0))
 
 
 # Button properties
@@ -284,44 +271,52 @@ play_again_button_rect = pygame.Rect(play_again_button_x, play_again_button_y, p
                                      play_again_button_height)
 
 
-def draw_landing_page():
-    screen.blit(landing_background, (0, 0))
+def build_landing_layer(size):
+    layer = pygame.Surface(size).convert()
+    layer.blit(landing_background, (0, 0))
 
     # Semi-transparent background for title
     title_bg = pygame.Surface((400, 120))
     title_bg.set_alpha(100)  # Low opacity
     title_bg.fill((0, 0, 0))
     title_bg_rect = title_bg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
-    screen.blit(title_bg, title_bg_rect)
+    layer.blit(title_bg, title_bg_rect)
 
     # Draw title
-    title_text = title_font.render("Pet Pal", True, (255, 255, 255))
+    title_text = text_cache.render(title_font, "Pet Pal", (255, 255, 255))
     title_rect = title_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
-    screen.blit(title_text, title_rect)
+    layer.blit(title_text, title_rect)
 
     # Draw play button
-    pygame.draw.rect(screen, (100, 200, 100), play_button_rect)
-    pygame.draw.rect(screen, (255, 255, 255), play_button_rect, 3)
+    pygame.draw.rect(layer, (100, 200, 100), play_button_rect)
+    pygame.draw.rect(layer, (255, 255, 255), play_button_rect, 3)
 
-    button_text = button_font.render("PLAY", True, (255, 255, 255))
+    button_text = text_cache.render(button_font, "PLAY", (255, 255, 255))
     button_text_rect = button_text.get_rect(center=play_button_rect.center)
-    screen.blit(button_text, button_text_rect)
+    layer.blit(button_text, button_text_rect)
 
+    return layer
 
-def draw_tutorial():
-    screen.blit(landing_background, (0, 0))
+
+def draw_landing_page():
+    screen.blit(scene_layers.get("landing", screen.get_size()), (0, 0))
+
+
+def build_tutorial_layer(size):
+    layer = pygame.Surface(size).convert()
+    layer.blit(landing_background, (0, 0))
 
     # Semi-transparent background for all tutorial content
     tutorial_bg = pygame.Surface((1000, 650))
     tutorial_bg.set_alpha(120)  # Low opacity
     tutorial_bg.fill((0, 0, 0))
     tutorial_bg_rect = tutorial_bg.get_rect(center=(WIDTH // 2, 400))
-    screen.blit(tutorial_bg, tutorial_bg_rect)
+    layer.blit(tutorial_bg, tutorial_bg_rect)
 
     # Draw title
-    title_text = title_font.render("How to Play", True, (255, 255, 255))
+    title_text = text_cache.render(title_font, "How to Play", (255, 255, 255))
     title_rect = title_text.get_rect(center=(WIDTH // 2, 100))
-    screen.blit(title_text, title_rect)
+    layer.blit(title_text, title_rect)
 
     # Tutorial text
     tutorial_lines = [
@@ -344,27 +339,55 @@ def draw_tutorial():
     y_offset = 200
     for line in tutorial_lines:
         if line:  # Skip empty lines
-            text = tutorial_font.render(line, True, (255, 255, 255))
+            text = text_cache.render(tutorial_font, line, (255, 255, 255))
             text_rect = text.get_rect(center=(WIDTH // 2, y_offset))
-            screen.blit(text, text_rect)
+            layer.blit(text, text_rect)
         y_offset += 40
 
     # Draw start game button (now larger)
-    pygame.draw.rect(screen, (100, 200, 100), start_game_button_rect)
-    pygame.draw.rect(screen, (255, 255, 255), start_game_button_rect, 3)
+    pygame.draw.rect(layer, (100, 200, 100), start_game_button_rect)
+    pygame.draw.rect(layer, (255, 255, 255), start_game_button_rect, 3)
 
-    button_text = button_font.render("START GAME", True, (255, 255, 255))
+    button_text = text_cache.render(button_font, "START GAME", (255, 255, 255))
     button_text_rect = button_text.get_rect(center=start_game_button_rect.center)
-    screen.blit(button_text, button_text_rect)
+    layer.blit(button_text, button_text_rect)
 
+    return layer
 
-def draw_game():
-    screen.blit(game_background, (0, 0))
+
+def draw_tutorial():
+    screen.blit(scene_layers.get("tutorial", screen.get_size()), (0, 0))
+
+
+def build_game_layer(size):
+    # Backdrop with everything that doesn't change during play: background, pet and action buttons
+    layer = pygame.Surface(size).convert()
+    layer.blit(assets.get("game_background"), (0, 0))
 
     # Center pet horizontally and position higher up
     pet_x = (WIDTH - 300) // 2  # Center horizontally (300 is new pet width)
     pet_y = HEIGHT - 450  # Moved up from 300 to 450 pixels from bottom
-    screen.blit(pet_img, (pet_x, pet_y))
+    layer.blit(assets.get("pet"), (pet_x, pet_y))
+
+    # Draw action buttons
+    layer.blit(assets.get("feed"), feed_button_rect)
+    layer.blit(assets.get("play"), action_play_button_rect)
+    layer.blit(assets.get("sleep"), sleep_button_rect)
+
+    return layer
+
+
+# A thin client only gets whole-number stats, which can sit on the other side of a mood
+# threshold from the server's, so it shows the mood the server worked out
+def shown_mood():
+    return pet.get_mood() if pet_client is None else pet.current_mood
+
+
+def draw_game():
+    screen.blit(scene_layers.get("game", screen.get_size()), (0, 0))
+
+    pet_x = (WIDTH - 300) // 2
+    pet_y = HEIGHT - 450
 
     # Draw stats
     draw_stat("Hunger", pet.hunger, 20)
@@ -372,13 +395,11 @@ def draw_game():
     draw_stat("Happiness", pet.happiness, 100)
 
     # Draw mood
-    mood_text = font.render(f"Mood: {pet.get_mood().title()}", True, (0, 0, 0))
+    mood_text = text_cache.render(font, f"Mood: {shown_mood().title()}", (0, 0, 0))
     screen.blit(mood_text, (20, 140))
 
-    # Draw action buttons
-    screen.blit(feed_img, feed_button_rect)
-    screen.blit(play_img, action_play_button_rect)
-    screen.blit(sleep_img, sleep_button_rect)
+    if not server_connected:
+        screen.blit(text_cache.render(font, DISCONNECTED_TEXT, (200, 0, 0)), (20, 180))
 
     # Draw speech bubble above pet
     draw_speech_bubble(pet_x, pet_y)
@@ -387,65 +408,232 @@ def draw_game():
     draw_congratulations_popup()
 
 
-# Game loop
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
+scene_layers.register("landing", build_landing_layer)
+scene_layers.register("tutorial", build_tutorial_layer)
+scene_layers.register("game", build_game_layer)
+scene_layers.register("popup", build_popup_layer)
+
+
+# Tell the dirty-rect renderer what the changing parts of the game screen show this frame
+def track_game_regions():
+    pet_x = (WIDTH - 300) // 2
+    pet_y = HEIGHT - 450
+
+    for label, value, y_pos in (("Hunger", pet.hunger, 20), ("Energy", pet.energy, 60), ("Happiness", pet.happiness, 100)):
+        stat_text = f"{label}: {int(value)}"
+        dirty_regions.track(label, text_cache.render(font, stat_text, (0, 0, 0)).get_rect(topleft=(20, y_pos)), stat_text)
+
+    mood_text = f"Mood: {shown_mood().title()}"
+    dirty_regions.track("mood", text_cache.render(font, mood_text, (0, 0, 0)).get_rect(topleft=(20, 140)), mood_text)
+
+    if pet_client is not None:
+        status_rect = text_cache.render(font, DISCONNECTED_TEXT, (200, 0, 0)).get_rect(topleft=(20, 180))
+        dirty_regions.track("server", status_rect, server_connected)
+
+    bubble_text = pet.speech_bubble_text if pet.speech_bubble_timer > 0 else None
+    dirty_regions.track("speech_bubble", speech_bubble_area(pet_x, pet_y), bubble_text)
+
+    # Action buttons never change on their own, they are repainted with the rest of the screen
+    for name, rect in (("feed", feed_button_rect), ("play", action_play_button_rect), ("sleep", sleep_button_rect)):
+        dirty_regions.track(name, rect, None)
+
+    # The popup dims the whole screen, so showing or hiding it repaints everything
+    dirty_regions.track("popup", screen.get_rect(), pet.congrats_popup_timer > 0)
+
+
+# Feed, play or sleep: the action itself, its sound, the pet's response and the save
+ACTIONS = {
+    "feed": (Pet.feed, "fed"),
+    "play": (Pet.play, "played"),
+    "sleep": (Pet.sleep, "slept"),
+}
+
+def do_action(action):
+    if pet_client is not None:
+        assets.get("bark").play()  # 🔊 Play sound
+        pet_client.send(action)  # The server applies it and pushes the new state back
+        return
+
+    apply, response = ACTIONS[action]
+    apply(pet)
+    assets.get("bark").play()  # 🔊 Play sound
+    pet.show_action_response(response, speech_worker)
+    save_game.record(0, pet, action)
+
+
+# Handle one input event
+def handle_event(event):
+    global current_state
+
+    if event.type == pygame.QUIT:
+        return False
+
+    elif event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWRESTORED, pygame.WINDOWSHOWN):
+        dirty_regions.invalidate()  # Window contents were lost, repaint it all
+
+    elif event.type == pygame.MOUSEBUTTONDOWN:
+        if current_state == LANDING and play_button_rect.collidepoint(event.pos):
+            current_state = TUTORIAL
+        elif current_state == TUTORIAL and start_game_button_rect.collidepoint(event.pos):
+            current_state = GAME
+        elif current_state == GAME:
+            # Check for Play Again button click (during congratulations popup)
+            if pet.congrats_popup_timer > 0 and play_again_button_rect.collidepoint(event.pos):
+                restart_game()
+            # Check action button clicks (only if no popup is showing)
+            elif pet.congrats_popup_timer == 0:
+                if feed_button_rect.collidepoint(event.pos):
+                    do_action("feed")
+                elif action_play_button_rect.collidepoint(event.pos):
+                    do_action("play")
+                elif sleep_button_rect.collidepoint(event.pos):
+                    do_action("sleep")
+
+    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+        profiler.toggle_overlay()
+
+    elif event.type == pygame.KEYDOWN and current_state == GAME and pet.congrats_popup_timer == 0:
+        # Only allow keyboard controls when popup is not showing
+        if event.key == pygame.K_f:
+            do_action("feed")
+        elif event.key == pygame.K_p:
+            do_action("play")
+        elif event.key == pygame.K_s:
+            do_action("sleep")
+
+    return True
+
+
+# Wrap a screen's draw function so drawing is timed apart from presenting, and the profiler overlay goes on top
+def profiled(draw_func):
+    def draw():
+        draw_func()
+        if profiler.overlay_visible:
+            profiler.draw_overlay(screen, tutorial_font, profiler_rect)
+        profiler.mark("draw")
+    return draw
+
+screen_drawers = {
+    LANDING: profiled(draw_landing_page),
+    TUTORIAL: profiled(draw_tutorial),
+    GAME: profiled(draw_game),
+}
+
+
+# Run one frame: handle input, step the pet and draw. Returns False once the window is closed.
+# now is the frame's time on the simulation clock (default: the real time); replay.py passes
+# recorded times and can skip drawing.
+drawn_state = None
+
+def run_frame(events, now=None, draw=True):
+    global drawn_state, server_connected
+    running = True
+    for event in events:
+        if not handle_event(event):
             running = False
-
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if current_state == LANDING and play_button_rect.collidepoint(event.pos):
-                current_state = TUTORIAL
-            elif current_state == TUTORIAL and start_game_button_rect.collidepoint(event.pos):
-                current_state = GAME
-            elif current_state == GAME:
-                # Check for Play Again button click (during congratulations popup)
-                if pet.congrats_popup_timer > 0 and play_again_button_rect.collidepoint(event.pos):
-                    restart_game()
-                # Check action button clicks (only if no popup is showing)
-                elif pet.congrats_popup_timer == 0:
-                    if feed_button_rect.collidepoint(event.pos):
-                        pet.feed()
-                        bark_sound.play()  # 🔊 Play sound
-                        pet.show_action_response("fed", generate_ai_message)
-
-                    elif action_play_button_rect.collidepoint(event.pos):
-                        pet.play()
-                        bark_sound.play()  # 🔊 Play sound
-                        pet.show_action_response("played", generate_ai_message)
-
-                    elif sleep_button_rect.collidepoint(event.pos):
-                        pet.sleep()
-                        bark_sound.play()  # 🔊 Play sound
-                        pet.show_action_response("slept", generate_ai_message)
-
-        elif event.type == pygame.KEYDOWN and current_state == GAME and pet.congrats_popup_timer == 0:
-            # Only allow keyboard controls when popup is not showing
-            if event.key == pygame.K_f:
-                pet.feed()
-                bark_sound.play()  # 🔊 Play sound
-                pet.show_action_response("fed", generate_ai_message)
-            elif event.key == pygame.K_p:
-                pet.play()
-                bark_sound.play()  # 🔊 Play sound
-                pet.show_action_response("played", generate_ai_message)
-            elif event.key == pygame.K_s:
-                pet.sleep()
-                bark_sound.play()  # 🔊 Play sound
-                pet.show_action_response("slept", generate_ai_message)
-
-    if current_state == LANDING:
-        draw_landing_page()
-    elif current_state == TUTORIAL:
-        draw_tutorial()
+    profiler.mark("events")
+
+    # A new screen is always drawn in full
+    if current_state != drawn_state:
+        dirty_regions.invalidate()
+        if current_state == GAME:
+            sim_clock.reset()  # The pet only ages while it's on screen
+        drawn_state = current_state
+
+    if current_state == GAME and pet_client is not None:
+        # The server steps the pet, just pick up what changed
+        if not pet_client.poll() and server_connected:
+            server_connected = False
+            print(f"{DISCONNECTED_TEXT} at {SERVER_ADDRESS}")
+        profiler.mark("update")
     elif current_state == GAME:
-        # Pass AI function to pet update
-        pet.update(generate_ai_message)
-        draw_game()
+        # Step the pet by the real time that passed (long stalls are jumped in one go),
+        # then pick up any AI replies that arrived
+        pet.advance_ticks(sim_clock.elapsed_ticks(now), speech_worker)
+        profiler.mark("update")
+        speech_worker.poll()
+        speech_worker.prefetch(pet)  # Have the next mood's speech ready before the mood flips
+        profiler.mark("ai")
+
+    if draw:
+        if current_state == GAME:
+            track_game_regions()
+        # Landing and tutorial screens are static: after the first frame nothing is redrawn
+        profile_version = profiler.overlay_version() if profiler.overlay_visible else None
+        dirty_regions.track("profiler", profiler_rect, profile_version)
+        pacer.frame_shown(dirty_regions.present(screen, screen_drawers[current_state]))
+        profiler.mark("present")
+
+    return running
+
+
+# PETPAL_RECORD=<file.jsonl> logs every frame's input with its time, for replay.py
+RECORD_PATH = os.getenv("PETPAL_RECORD")
+input_recorder = None
+
+
+def read_input():
+    # Events for the next frame and the time the frame starts at
+    now = sim_clock.time_func()
+    events = pacer.get_events()
+    if input_recorder is not None:
+        input_recorder.record(now, events)
+    return events, now
+
+
+# Seconds until the screen changes without any input, so an idle loop can sleep until then
+def time_to_next_change():
+    if current_state != GAME:
+        return None  # Landing and tutorial screens only change on input
+    if pet_client is not None:
+        # Changes arrive from the server, until it has gone away
+        return CLIENT_POLL_INTERVAL if server_connected else None
+    ticks = pet.ticks_until_visible_change()
+    return None if ticks is None else sim_clock.time_until(ticks)
+
+
+def shutdown():
+    if input_recorder is not None:
+        input_recorder.close()
+    if PROFILE_PATH:
+        profiler.export_json(PROFILE_PATH)
+        profiler.export_chrome_trace(os.path.splitext(PROFILE_PATH)[0] + ".trace.json")
+    speech_worker.shutdown()
+    assets.shutdown()
+    stats = ai_health.stats()
+    if stats["calls"] or stats["rejected"]:
+        print(f"AI calls: {stats['calls']} ({stats['failures']} failed, {stats['rejected']} skipped), "
+              f"p95 {stats['p95_latency']:.2f} s, {stats['prompt_tokens'] + stats['completion_tokens']} tokens, "
+              f"${stats['cost']:.4f}")
+    message_cache.save()
+    if pet_client is not None:
+        pet_client.close()
+        save_game.close()  # The pet is saved by the server
+    else:
+        save_game.close({0: pet})
+    pygame.quit()
+
+
+# Game loop
+def main():
+    global input_recorder
+    if RECORD_PATH:
+        input_recorder = InputRecorder(RECORD_PATH, current_state, pet)
+
+    running = run_frame(*read_input())
+    print(f"First frame after {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms")
+
+    while running:
+        profiler.begin_frame()
+        # Nothing is drawn while the window is minimized; restoring it repaints everything
+        running = run_frame(*read_input(), draw=pacer.visible)
+        pacer.wait(time_to_next_change())
+        profiler.mark("idle")
+        profiler.end_frame()
+
+    shutdown()
+    sys.exit()
 
-    pygame.display.flip()
-    clock.tick(60)
 
-pygame.quit()
-sys.exit()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# ai_health.py
+import threading
+import time
+from collections import deque
+
+# Dollars per 1000 tokens (prompt, completion) for the models the game uses
+PRICES = {"gpt-3.5-turbo": (0.0005, 0.0015)}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the API while it is considered unhealthy"""
+
+
+class AIHealth:
+    """Tracks how the AI API is doing and stops calling it while it is failing or too slow.
+
+    Every call is timed with record(). A call that raises or takes longer than
+    `budget` seconds counts as a failure. When the failure rate or the p95
+    latency over the last `window` calls goes over the limit, the circuit
+    opens: allow() says no for `cooldown` seconds, then lets a single probe
+    through (half-open). The probe closes the circuit if it succeeds within
+    budget and opens it again otherwise.
+    """
+
+    def __init__(self, budget=2.0, window=20, min_samples=5, max_error_rate=0.5, cooldown=30.0,
+                 time_func=time.monotonic):
+        self.budget = budget
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.time_func = time_func
+        self.lock = threading.Lock()  # Calls are recorded from worker threads
+        self.samples = deque(maxlen=window)  # (seconds, failed) of recent calls
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+
+        # Counters since startup
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0  # Calls skipped because the circuit was open
+        self.trips = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.total_latency = 0.0
+
+    def allow(self):
+        """Whether a call may go out now. A True while half-open must be followed by record()."""
+        with self.lock:
+            if self.state == "open" and self.time_func() - self.opened_at >= self.cooldown:
+                self.state = "half-open"
+                self.probing = False
+            if self.state == "closed":
+                return True
+            if self.state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def is_open(self):
+        """Whether calls are currently being refused, without using up the half-open probe"""
+        with self.lock:
+            return self.state == "open" and self.time_func() - self.opened_at < self.cooldown
+
+    def record(self, seconds, error=None, usage=None, model="gpt-3.5-turbo"):
+        """Record one call: how long it took, the exception it raised (if any) and its token usage"""
+        failed = error is not None or seconds > self.budget
+        with self.lock:
+            self.calls += 1
+            self.failures += failed
+            self.total_latency += seconds
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens
+                self.completion_tokens += usage.completion_tokens
+                prompt_price, completion_price = PRICES.get(model, (0.0, 0.0))
+                self.cost += (usage.prompt_tokens * prompt_price + usage.completion_tokens * completion_price) / 1000
+
+            if self.state == "half-open":
+                self.probing = False
+                if failed:
+                    self._trip()
+                else:
+                    self.state = "closed"
+                    self.samples.clear()
+                return
+
+            self.samples.append((seconds, failed))
+            if self.state == "closed" and len(self.samples) >= self.min_samples:
+                if self._error_rate() > self.max_error_rate or self._p95() > self.budget:
+                    self._trip()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "trips": self.trips,
+                "error_rate": self._error_rate(),
+                "p95_latency": self._p95(),
+                "mean_latency": self.total_latency / self.calls if self.calls else 0.0,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cost": self.cost,
+            }
+
+    def _trip(self):
+        self.state = "open"
+        self.opened_at = self.time_func()
+        self.trips += 1
+        self.samples.clear()
+
+    def _error_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(failed for _, failed in self.samples) / len(self.samples)
+
+    def _p95(self):
+        if not self.samples:
+            return 0.0
+        latencies = sorted(seconds for seconds, _ in self.samples)
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
@@ -0,0 +1,235 @@
+# ai_messages.py
+import json
+import os
+import threading
+import time
+from functools import partial
+from dotenv import load_dotenv
+from pet import MOOD_MESSAGES, ACTION_MESSAGES, mood_for
+from ai_health import AIHealth, CircuitOpen
+from message_cache import MessageCache
+from request_broker import RequestBroker
+
+# Load environment variables
+load_dotenv()
+
+# Seconds to wait for an AI reply before keeping the static message
+AI_TIMEOUT = 5.0
+
+# Replies slower than this (seconds) count as failures; PETPAL_AI_BUDGET overrides it
+AI_LATENCY_BUDGET = float(os.getenv("PETPAL_AI_BUDGET", "2.0"))
+ai_health = AIHealth(budget=AI_LATENCY_BUDGET)
+
+# OpenAI client, created on first use: importing the openai package alone takes most of a second
+openai_client = None
+openai_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    global openai_client
+    with openai_client_lock:
+        if openai_client is None:
+            from openai import OpenAI
+            openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), timeout=AI_TIMEOUT, max_retries=0)
+        return openai_client
+
+
+def create_completion(parse=None, **kwargs):
+    """Call the chat completions API, timed by ai_health. Raises CircuitOpen while the API is unhealthy.
+
+    If given, parse(response) is returned instead of the response, and a reply it
+    raises on counts as a failed call. Streamed calls are only timed here if they
+    fail to start; stream_ai_message records the rest.
+    """
+    if not ai_health.allow():
+        raise CircuitOpen("AI API is unhealthy")
+    start = time.perf_counter()
+    response = None
+    try:
+        response = get_openai_client().chat.completions.create(**kwargs)
+        result = parse(response) if parse is not None else response
+    except Exception as e:
+        ai_health.record(time.perf_counter() - start, error=e, usage=getattr(response, "usage", None),
+                         model=kwargs["model"])
+        raise
+    if not kwargs.get("stream"):
+        ai_health.record(time.perf_counter() - start, usage=getattr(response, "usage", None), model=kwargs["model"])
+    return result
+
+# Replies are cached on disk so repeat moods/actions don't pay for a new completion
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+message_cache = MessageCache(os.path.join(BASE_DIR, "message_cache.json"))
+message_cache.load()
+
+
+def build_messages(mood, hunger, energy, happiness, recent_action=None):
+    # Create context for the AI
+    context = f"You are a cute virtual pet. Your current stats are: Hunger: {hunger:.1f}, Energy: {energy:.1f}, Happiness: {happiness:.1f}. Your mood is: {mood}."
+
+    if recent_action:
+        context += f" Your owner just {recent_action}."
+
+    prompt = f"{context} Respond with a short, cute message (max 7 words) that reflects how you're feeling. Use simple, friendly language limited to alphanumerical text, no emojis."
+
+    return [
+        {"role": "system",
+         "content": "You are a cute virtual pet who speaks in short, adorable messages.  Use simple, friendly language limited to alphanumerical text, no emojis."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def filter_text(text):
+    # Keep only alphanumeric characters, spaces, punctuation, and basic symbols
+    return ''.join(char for char in text if ord(char) < 256)
+
+
+def request_ai_message(mood, hunger, energy, happiness, recent_action=None):
+    """Ask OpenAI for a new message. Raises on any API error."""
+    response = create_completion(
+        model="gpt-3.5-turbo",
+        messages=build_messages(mood, hunger, energy, happiness, recent_action),
+        max_tokens=50,
+        temperature=0.8
+    )
+
+    # Get response and filter out emojis/special characters
+    message = response.choices[0].message.content.strip()
+    return filter_text(message)
+
+
+def request_ai_batch(requests):
+    """Ask for several messages in one completion. requests is a list of request_ai_message argument tuples.
+
+    Raises ValueError if the reply isn't a JSON array of one message per request.
+    """
+    pets = []
+    for number, (mood, hunger, energy, happiness, recent_action) in enumerate(requests, 1):
+        line = f"{number}. Hunger: {hunger:.1f}, Energy: {energy:.1f}, Happiness: {happiness:.1f}. Mood: {mood}."
+        if recent_action:
+            line += f" Their owner just {recent_action}."
+        pets.append(line)
+
+    prompt = ("You are speaking for several cute virtual pets. Their current stats are:\n" + "\n".join(pets) +
+              "\nFor each pet, write a short, cute message (max 7 words) that reflects how it's feeling. "
+              "Use simple, friendly language limited to alphanumerical text, no emojis. "
+              f"Respond with only a JSON array of {len(requests)} strings, in the same order as the pets.")
+
+    def split_reply(response):
+        # Ignore anything around the array, e.g. a ```json fence
+        content = response.choices[0].message.content
+        messages = json.loads(content[content.find("["):content.rfind("]") + 1])
+        if not isinstance(messages, list) or len(messages) != len(requests):
+            raise ValueError(f"expected a JSON array of {len(requests)} messages")
+        return [filter_text(str(message).strip()) for message in messages]
+
+    # Parsed inside create_completion so a reply we can't use is recorded as a failed call
+    return create_completion(
+        parse=split_reply,
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system",
+             "content": "You are a cute virtual pet who speaks in short, adorable messages.  Use simple, friendly language limited to alphanumerical text, no emojis."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=50 * len(requests),
+        temperature=0.8
+    )
+
+
+class StreamAbandoned(Exception):
+    """Raised by stream_ai_message when on_text asked it to stop"""
+
+
+def stream_ai_message(mood, hunger, energy, happiness, recent_action=None, on_text=None):
+    """Like request_ai_message, but reads the reply chunk by chunk as it is generated.
+
+    on_text(text) is called with the reply so far every time a chunk adds to it.
+    If it returns False the rest of the reply is dropped and StreamAbandoned is raised.
+    Set OPENAI_BASE_URL to point this at a local stand-in server (see fake_openai_server.py).
+    """
+    start = time.perf_counter()
+    stream = create_completion(
+        model="gpt-3.5-turbo",
+        messages=build_messages(mood, hunger, energy, happiness, recent_action),
+        max_tokens=50,
+        temperature=0.8,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+
+    text = ""
+    first_token = None  # Seconds until the first text arrived, which is what the player waits for
+    usage = None
+    error = None
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage  # Sent with the last chunk
+            if not chunk.choices:
+                continue
+            piece = filter_text(chunk.choices[0].delta.content or "")
+            if not piece:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            text += piece
+            if on_text is not None and text.strip() and on_text(text.lstrip()) is False:
+                raise StreamAbandoned()
+    except StreamAbandoned:
+        raise
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        stream.close()
+        seconds = first_token if first_token is not None else time.perf_counter() - start
+        ai_health.record(seconds, error=error, usage=usage, model="gpt-3.5-turbo")
+    return text.strip()
+
+
+# Every generator goes through one broker: identical prompts in flight are sent once and
+# bursts are batched. They all share the one OpenAI client, which keeps its connections open.
+broker = RequestBroker(request_ai_message, request_ai_batch, stream_ai_message, key_func=message_cache.make_key)
+
+
+def static_message(mood, recent_action=None):
+    # The same text Pet shows while it waits for the AI
+    if recent_action:
+        return ACTION_MESSAGES.get(recent_action, "Thanks!")
+    return MOOD_MESSAGES.get(mood, "Hello!")
+
+
+# AI Message Generation
+def generate_ai_message(mood, hunger, energy, happiness, recent_action=None):
+    try:
+        text = message_cache.get(mood, hunger, energy, happiness, recent_action)
+        if text is not None:
+            return text
+        if ai_health.is_open():
+            raise CircuitOpen("AI API is unhealthy")  # Don't wait out the batching window for nothing
+        return message_cache.fetch(broker.request, mood, hunger, energy, happiness, recent_action)
+    except CircuitOpen:
+        return static_message(mood, recent_action)
+    except Exception as e:
+        print(f"AI message generation failed: {e}")
+        # Fallback to static messages
+        return static_message(mood, recent_action)
+
+
+def generate_streamed_ai_message(mood, hunger, energy, happiness, recent_action=None, on_text=None):
+    """generate_ai_message, with on_text called as the reply streams in"""
+    try:
+        return message_cache.fetch(partial(broker.stream, on_text=on_text),
+                                   mood, hunger, energy, happiness, recent_action)
+    except (StreamAbandoned, CircuitOpen):
+        # Nobody is waiting for this reply any more, or the API is down
+        return static_message(mood, recent_action)
+    except Exception as e:
+        print(f"AI message generation failed: {e}")
+        return static_message(mood, recent_action)
+
+
+if __name__ == "__main__":
+    # Fill the message cache ahead of time: python ai_messages.py
+    added = message_cache.prewarm(request_ai_message, mood_for)
+    print(f"Prewarmed {added} messages into {message_cache.path}")
+    print(f"AI calls: {ai_health.stats()}")
@@ -0,0 +1,89 @@
+# assets.py
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+
+class AssetManager:
+    """Loads images and sounds on a thread pool so the first screen doesn't wait for all of them.
+
+    request_image()/request_sound() start decoding in the background and get()
+    returns the finished asset, waiting only if it isn't ready yet. Scaled images
+    are also written to cache_dir as raw pixels, keyed on a hash of the source
+    file and the target size, so later runs skip decoding and scaling.
+    """
+
+    def __init__(self, asset_dir, cache_dir=None, max_workers=4):
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="assets")
+        self.pending = {}  # name -> (future, finish function run on the main thread)
+        self.loaded = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def request_image(self, name, filename, size, colorkey=None, alpha=False):
+        """Start loading an image scaled to size; colorkey/alpha are applied once it is converted"""
+        future = self.executor.submit(self._load_pixels, filename, size, alpha)
+        self.pending[name] = (future, lambda surface: _to_display_format(surface, colorkey, alpha))
+
+    def request_sound(self, name, filename):
+        future = self.executor.submit(pygame.mixer.Sound, os.path.join(self.asset_dir, filename))
+        self.pending[name] = (future, None)
+
+    def load_image(self, name, filename, size, colorkey=None, alpha=False):
+        """Load an image right away, for what the first frame needs"""
+        self.request_image(name, filename, size, colorkey, alpha)
+        return self.get(name)
+
+    def get(self, name):
+        asset = self.loaded.get(name)
+        if asset is not None:
+            return asset
+
+        # Converting to the display format has to happen on the main thread
+        future, finish = self.pending.pop(name)
+        asset = future.result()
+        if finish is not None:
+            asset = finish(asset)
+        self.loaded[name] = asset
+        return asset
+
+    def background(self, func, *args):
+        """Run other slow startup work (e.g. starting the music) on the pool"""
+        return self.executor.submit(func, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load_pixels(self, filename, size, alpha):
+        path = os.path.join(self.asset_dir, filename)
+        pixel_format = "RGBA" if alpha else "RGB"
+
+        cache_path = None
+        if self.cache_dir:
+            with open(path, "rb") as f:
+                source_hash = hashlib.sha1(f.read()).hexdigest()
+            cache_path = os.path.join(self.cache_dir, f"{source_hash}_{size[0]}x{size[1]}_{pixel_format}.raw")
+            if os.path.exists(cache_path):
+                with open(cache_path, "rb") as f:
+                    return pygame.image.frombytes(f.read(), size, pixel_format)
+
+        surface = pygame.transform.scale(pygame.image.load(path), size)
+
+        if cache_path:
+            # Write under a temporary name first so another run never reads a partial file
+            temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(pygame.image.tobytes(surface, pixel_format))
+            os.replace(temp_path, cache_path)
+        return surface
+
+
+def _to_display_format(surface, colorkey, alpha):
+    surface = surface.convert_alpha() if alpha else surface.convert()
+    if colorkey is not None:
+        surface.set_colorkey(colorkey)
+    return surface
@@ -0,0 +1,294 @@
+# benchmark.py
+# Headless benchmarks for the simulation, the renderer and the AI path.
+#
+#   python benchmark.py --output results.json
+#   python benchmark.py --baseline results.json   # exits with 1 if anything got slower
+import argparse
+import importlib.util
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+# No window, no sound card, no real OpenAI account needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import pygame
+import ai_messages
+from assets import AssetManager
+from pet import Pet
+from speech_worker import SpeechWorker
+
+
+class StubCompletions:
+    """Stands in for openai_client.chat.completions with a fixed reply and latency.
+
+    Batched prompts (asking for a JSON array of N strings) get N copies, like fake_openai_server.py.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def create(self, stream=False, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if stream:
+            return StubStream("I love playing with you!")
+        batch = re.search(r"JSON array of (\d+) strings", kwargs["messages"][-1]["content"])
+        if batch:
+            message = SimpleNamespace(content=json.dumps(["I love playing with you!"] * int(batch.group(1))))
+        else:
+            message = SimpleNamespace(content="I love playing with you!")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class StubStream:
+    """Streamed reply, one word per chunk"""
+
+    def __init__(self, text):
+        words = text.split(" ")
+        self.chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word if i == 0 else " " + word))])
+                       for i, word in enumerate(words)]
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+def percentiles(samples, unit):
+    ordered = sorted(samples)
+
+    def at(fraction):
+        # Nearest-rank percentile
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        "unit": unit,
+        "samples": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": at(0.50),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": ordered[-1],
+    }
+
+
+def time_calls(func, repeats):
+    # Milliseconds per call
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def load_game():
+    """Import Pet Pal.py as a module, with a stub OpenAI client and a throwaway save file"""
+    os.environ["PETPAL_SAVE"] = os.path.join(tempfile.mkdtemp(prefix="petpal-bench-"), "bench.sav")
+    spec = importlib.util.spec_from_file_location("pet_pal", os.path.join(BASE_DIR, "Pet Pal.py"))
+    game = importlib.util.module_from_spec(spec)
+    start = time.perf_counter()
+    spec.loader.exec_module(game)
+    return game, (time.perf_counter() - start) * 1000
+
+
+def bench_simulation(results, iterations):
+    batch = 1000
+    pet = Pet()
+
+    def update_batch():
+        for _ in range(batch):
+            pet.update()
+
+    def mood_batch():
+        for _ in range(batch):
+            pet.get_mood()
+
+    # Microseconds per call
+    results["pet_update"] = percentiles([ms * 1000 / batch for ms in time_calls(update_batch, iterations)], "us")
+    results["pet_get_mood"] = percentiles([ms * 1000 / batch for ms in time_calls(mood_batch, iterations)], "us")
+
+
+def bench_assets(results, game, iterations):
+    """Start-up asset loading as the game does it: everything requested from an AssetManager, then get()"""
+    images = (game.LANDING_IMAGE,) + game.GAME_IMAGES
+
+    def load_all(cache_dir):
+        assets = AssetManager(game.ASSET_PATH, cache_dir=cache_dir)
+        for image in images:
+            assets.request_image(*image)
+        for sound in game.GAME_SOUNDS:
+            assets.request_sound(*sound)
+        for name in [image[0] for image in images] + [sound[0] for sound in game.GAME_SOUNDS]:
+            assets.get(name)
+        assets.shutdown()
+
+    def cold():
+        # Empty cache: every image is decoded, scaled and written to the cache
+        with tempfile.TemporaryDirectory(prefix="petpal-assets-") as cache_dir:
+            load_all(cache_dir)
+
+    with tempfile.TemporaryDirectory(prefix="petpal-assets-") as warm_dir:
+        load_all(warm_dir)
+        results["asset_load_cold"] = percentiles(time_calls(cold, iterations), "ms")
+        results["asset_load_warm"] = percentiles(time_calls(lambda: load_all(warm_dir), iterations), "ms")
+
+
+def bench_drawing(results, game, frames):
+    pet = game.pet
+    pet_x, pet_y = (game.WIDTH - 300) // 2, game.HEIGHT - 450
+    pet.show_action_response("played")
+
+    results["draw_landing_page"] = percentiles(time_calls(game.draw_landing_page, frames), "ms")
+    results["draw_tutorial"] = percentiles(time_calls(game.draw_tutorial, frames), "ms")
+    results["draw_game"] = percentiles(time_calls(game.draw_game, frames), "ms")
+    results["draw_speech_bubble"] = percentiles(time_calls(lambda: game.draw_speech_bubble(pet_x, pet_y), frames), "ms")
+
+    pet.congrats_popup_timer = 1
+    results["draw_congratulations_popup"] = percentiles(time_calls(game.draw_congratulations_popup, frames), "ms")
+    pet.congrats_popup_timer = 0
+
+
+def scripted_events(game, frames):
+    """Events for each frame: start the game, then feed, play and sleep in turn"""
+    script = {
+        1: [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=game.play_button_rect.center, button=1)],
+        3: [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=game.start_game_button_rect.center, button=1)],
+    }
+    keys = [pygame.K_f, pygame.K_p, pygame.K_s]
+    for frame in range(10, frames, 30):
+        script[frame] = [pygame.event.Event(pygame.KEYDOWN, key=keys[(frame // 30) % 3])]
+    return [script.get(frame, []) for frame in range(frames)]
+
+
+def bench_end_to_end(results, game, frames):
+    game.restart_game()
+    samples = []
+    for events in scripted_events(game, frames):
+        start = time.perf_counter()
+        game.run_frame(events)
+        samples.append((time.perf_counter() - start) * 1000)
+    results["frame_end_to_end"] = percentiles(samples, "ms")
+
+
+def bench_ai(results, samples):
+    """Speech round trips as the game makes them: submit() on a SpeechWorker, poll() until the reply lands.
+
+    Misses go through the broker and the stub client, hits are served from the message cache.
+    """
+    ready = threading.Event()
+    worker = SpeechWorker(ai_messages.generate_ai_message, timeout=ai_messages.AI_LATENCY_BUDGET,
+                          cache=ai_messages.message_cache, stream_func=ai_messages.generate_streamed_ai_message,
+                          on_ready=ready.set)
+    pet = Pet()
+    mood = pet.get_mood()
+
+    def round_trip():
+        pet.show_speech_bubble(mood, worker)
+        while pet in worker.pending:
+            ready.wait(0.01)
+            ready.clear()
+            worker.poll()
+
+    def miss():
+        ai_messages.message_cache.entries.clear()
+        round_trip()
+
+    results["ai_round_trip_miss"] = percentiles(time_calls(miss, samples), "ms")
+    for number in range(ai_messages.message_cache.pool_size):  # A full pool, so get() answers
+        ai_messages.message_cache.add(mood, pet.hunger, pet.energy, pet.happiness, None, f"Cached reply {number}")
+    results["ai_round_trip_hit"] = percentiles(time_calls(round_trip, samples), "ms")
+    worker.shutdown(wait=True)
+
+
+def compare(results, baseline, tolerance):
+    """Return a line per benchmark whose p95 is more than `tolerance` slower than the baseline"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["p95"] > previous["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95']:.4f} {current['unit']} "
+                               f"vs baseline {previous['p95']:.4f} {previous['unit']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Pet Pal benchmarks")
+    parser.add_argument("--frames", type=int, default=600, help="frames per rendering benchmark")
+    parser.add_argument("--iterations", type=int, default=200, help="samples per simulation benchmark")
+    parser.add_argument("--ai-samples", type=int, default=10, help="round trips per AI benchmark")
+    parser.add_argument("--ai-latency", type=float, default=0.5, help="seconds the stub OpenAI client takes to reply")
+    parser.add_argument("--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results to compare against; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # The AI path goes through the real worker and cache, only the network is stubbed
+    stub = StubCompletions(args.ai_latency)
+    ai_messages.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=stub))
+    ai_messages.message_cache.path = None
+    ai_messages.message_cache.entries.clear()
+
+    game, startup_ms = load_game()
+    start = time.perf_counter()
+    game.run_frame([])
+    first_frame_ms = startup_ms + (time.perf_counter() - start) * 1000
+    results = {
+        "startup_import": percentiles([startup_ms], "ms"),
+        "time_to_first_frame": percentiles([first_frame_ms], "ms"),
+    }
+    bench_simulation(results, args.iterations)
+    bench_assets(results, game, max(1, args.iterations // 20))
+    bench_drawing(results, game, args.frames)
+    bench_end_to_end(results, game, args.frames)
+    game.speech_worker.shutdown(wait=True)  # Let replies still in flight finish, so the AI counters agree
+    game.shutdown()
+    bench_ai(results, args.ai_samples)
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "pygame": pygame.version.ver,
+            "frames": args.frames,
+            "iterations": args.iterations,
+            "ai_latency": args.ai_latency,
+            "ai_samples": args.ai_samples,
+            "ai_calls": stub.calls,
+            "ai_health": ai_messages.ai_health.stats(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
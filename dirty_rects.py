@@ -0,0 +1,69 @@
+# dirty_rects.py
+import pygame
+
+
+class DirtyRegions:
+    """Redraws and presents only the parts of the screen that changed.
+
+    Each frame, call track() for every region that can change with a value
+    describing what it shows (its "signature"). Regions whose signature or
+    position changed are redrawn with the screen clipped to them and pushed
+    with pygame.display.update(rects) instead of a full flip.
+    """
+
+    def __init__(self):
+        self.regions = {}  # name -> (rect, signature) as last presented
+        self.dirty = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Redraw the whole screen next frame (state change, window exposed, ...)"""
+        self.full_redraw = True
+
+    def track(self, name, rect, signature):
+        rect = pygame.Rect(rect)
+        previous = self.regions.get(name)
+        if previous is not None and previous[0] == rect and previous[1] == signature:
+            return
+        # Repaint where it was and where it is now
+        if previous is not None:
+            self.dirty.append(previous[0])
+        self.dirty.append(rect)
+        self.regions[name] = (rect, signature)
+
+    def present(self, screen, draw_func):
+        """Draw the changed regions with draw_func and show them. Returns the updated rects."""
+        if self.full_redraw:
+            draw_func()
+            pygame.display.flip()
+            self.full_redraw = False
+            self.dirty = []
+            return [screen.get_rect()]
+
+        if not self.dirty:
+            return []
+
+        rects = _merge_overlapping(self.dirty)
+        self.dirty = []
+        for rect in rects:
+            screen.set_clip(rect)  # Drawing outside the clip is skipped, so this only repaints the region
+            draw_func()
+        screen.set_clip(None)
+        pygame.display.update(rects)
+        return rects
+
+
+def _merge_overlapping(rects):
+    # Combine rects that touch so overlapping areas are only drawn once
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
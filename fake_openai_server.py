@@ -0,0 +1,128 @@
+# fake_openai_server.py
+# Local stand-in for the OpenAI chat completions endpoint, for trying the AI path offline.
+#
+#   python fake_openai_server.py --port 8765 --first-token 0.3 --per-token 0.05
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python "Pet Pal.py"
+#
+# Streaming requests get the reply as server-sent events, one word per chunk. Batched
+# requests (asking for a JSON array of N strings) get N numbered copies of the reply.
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "I love spending time with you!"
+
+
+class CompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    reply = REPLY
+    first_token_delay = 0.3  # Seconds before the first chunk (or the whole reply)
+    per_token_delay = 0.05  # Seconds between chunks
+    requests = 0  # Completions served so far
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        type(self).requests += 1
+        time.sleep(self.first_token_delay)
+        if body.get("stream"):
+            self.send_stream(body.get("model", "stand-in"))
+            return
+
+        batch = re.search(r"JSON array of (\d+) strings", body["messages"][-1]["content"])
+        if batch:
+            text = json.dumps([f"{self.reply} ({i + 1})" for i in range(int(batch.group(1)))])
+        else:
+            text = self.reply
+        self.send_json(completion(body.get("model", "stand-in"), text))
+
+    def send_json(self, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")  # The stream ends when the connection does
+        self.end_headers()
+
+        words = self.reply.split(" ")
+        pieces = [word if i == 0 else " " + word for i, word in enumerate(words)]
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(self.per_token_delay)
+                self.send_event(chunk(model, {"content": piece}, None))
+            self.send_event(chunk(model, {}, "stop"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading, e.g. the bubble was replaced
+
+    def send_event(self, payload):
+        self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def completion(model, text):
+    return {
+        "id": "chatcmpl-stand-in",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+    }
+
+
+def chunk(model, delta, finish_reason):
+    return {
+        "id": "chatcmpl-stand-in",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def serve(port=0, reply=REPLY, first_token_delay=0.3, per_token_delay=0.05):
+    """Start the server and return it; port 0 picks a free port (see server.server_address)"""
+    handler = type("Handler", (CompletionsHandler,), {
+        "reply": reply,
+        "first_token_delay": first_token_delay,
+        "per_token_delay": per_token_delay,
+    })
+    server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 128, "daemon_threads": True})
+    return server_class(("127.0.0.1", port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI chat completions API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reply", default=REPLY)
+    parser.add_argument("--first-token", type=float, default=0.3, help="seconds before the first chunk")
+    parser.add_argument("--per-token", type=float, default=0.05, help="seconds between chunks")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.reply, args.first_token, args.per_token)
+    print(f"Serving on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
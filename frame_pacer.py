@@ -0,0 +1,96 @@
+# frame_pacer.py
+import math
+import time
+import pygame
+
+# Video drivers SDL can truly block on while waiting for events. On others
+# pygame.event.wait() polls every millisecond, so the pacer sleeps a frame at a time instead.
+BLOCKING_DRIVERS = ("x11", "wayland", "windows", "cocoa")
+
+
+class FramePacer:
+    """Decides how long the game loop sleeps between frames.
+
+    While frames keep showing something new the loop runs at fps. Once a frame
+    presents nothing it slows to idle_fps, background_fps while the window is
+    unfocused, or hidden_fps while it is minimized. Waiting is done in
+    pygame.event.wait (see BLOCKING_DRIVERS), so input ends the wait at once,
+    as does wake(), which other threads may call. wait() can also be told when
+    the screen is next due to change, to wake up right then instead of at the
+    idle rate.
+    """
+
+    def __init__(self, fps=60, idle_fps=2, background_fps=1, hidden_fps=0.2):
+        self.frame_time = 1 / fps
+        self.idle_time = 1 / idle_fps
+        self.background_time = 1 / background_fps
+        self.hidden_time = 1 / hidden_fps
+        self.wake_event = pygame.event.custom_type()
+        self.woken_by = []  # Event that ended the last wait, handed out with the next frame's input
+        self.focused = True
+        self.visible = True
+        self.active = True  # Whether the last frame showed anything new
+        self.frame_start = time.perf_counter()
+        self.blocking_wait = pygame.display.get_driver() in BLOCKING_DRIVERS
+
+    def get_events(self):
+        """The next frame's input, in place of pygame.event.get()"""
+        events = self.woken_by + pygame.event.get()
+        self.woken_by = []
+        for event in events:
+            if event.type == pygame.WINDOWFOCUSLOST:
+                self.focused = False
+            elif event.type == pygame.WINDOWFOCUSGAINED:
+                self.focused = True
+            elif event.type in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+                self.visible = False
+            elif event.type in (pygame.WINDOWRESTORED, pygame.WINDOWMAXIMIZED, pygame.WINDOWSHOWN):
+                self.visible = True
+        return [event for event in events if event.type != self.wake_event]
+
+    def wake(self):
+        """End the current wait early, e.g. when a background thread has something to show"""
+        try:
+            pygame.event.post(pygame.event.Event(self.wake_event))
+        except pygame.error:
+            pass  # The display is already closed: the game is shutting down, nothing to wake
+
+    def frame_shown(self, rects):
+        """Tell the pacer what the frame presented (what DirtyRegions.present() returned)"""
+        self.active = bool(rects)
+
+    def wait(self, next_change=None):
+        """Sleep until the next frame is due or input arrives.
+
+        next_change is how many seconds until the screen changes by itself, if known.
+        """
+        if not self.visible:
+            # Nothing can be seen, so there is nothing to wake up for. Checked before active,
+            # which still describes the last frame drawn before the window was minimized.
+            timeout = self.hidden_time
+        elif self.active:
+            timeout = self.frame_time
+        else:
+            timeout = self.idle_time if self.focused else self.background_time
+            if next_change is not None:
+                timeout = min(timeout, next_change)
+
+        # Never faster than fps, even while input keeps arriving
+        _sleep_until(self.frame_start + self.frame_time)
+        due = self.frame_start + timeout
+        remaining = due - time.perf_counter()
+        if remaining > 0 and self.blocking_wait:
+            event = pygame.event.wait(math.ceil(remaining * 1000))
+            if event.type != pygame.NOEVENT:
+                self.woken_by.append(event)
+        elif remaining > 0:
+            # Input is then picked up within a frame
+            while not pygame.event.peek() and time.perf_counter() < due:
+                _sleep_until(min(due, time.perf_counter() + self.frame_time))
+        self.frame_start = time.perf_counter()
+
+
+def _sleep_until(deadline):
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
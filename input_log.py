@@ -0,0 +1,128 @@
+# input_log.py
+# Timestamped input logs: written by the game with PETPAL_RECORD=<file>, played back by replay.py.
+#
+# One JSON object per line. The first line describes where the session started
+# ({"start": {"state": ..., "pet": {...}}}), every other line is one frame that
+# had input: {"t": seconds since the recording started, "prev": time of the frame
+# before it, "events": [...]}. The game handles events against the pet as of the
+# previous frame, so replays step the pet to "prev" first.
+import json
+import random
+import pygame
+from pet import Pet
+
+# Only events that change what the game does are recorded
+RECORDED_EVENTS = {
+    "QUIT": pygame.QUIT,
+    "MOUSEBUTTONDOWN": pygame.MOUSEBUTTONDOWN,
+    "KEYDOWN": pygame.KEYDOWN,
+}
+EVENT_FIELDS = ("pos", "button", "key")
+
+
+def event_to_dict(event):
+    """Return a JSON-friendly dict for an event worth recording, or None"""
+    for name, event_type in RECORDED_EVENTS.items():
+        if event.type == event_type:
+            fields = {field: getattr(event, field) for field in EVENT_FIELDS if hasattr(event, field)}
+            if "pos" in fields:
+                fields["pos"] = list(fields["pos"])
+            return {"type": name, **fields}
+    return None
+
+
+def event_from_dict(data):
+    fields = {field: data[field] for field in EVENT_FIELDS if field in data}
+    if "pos" in fields:
+        fields["pos"] = tuple(fields["pos"])
+    return pygame.event.Event(RECORDED_EVENTS[data["type"]], fields)
+
+
+def pet_state(pet):
+    # Every field of a Pet (or PetView), by name
+    return {field: getattr(pet, field) for field in Pet.__slots__}
+
+
+def apply_pet_state(pet, state):
+    for field, value in state.items():
+        setattr(pet, field, value)
+
+
+class InputRecorder:
+    """Appends the input of every frame that had any to a log file"""
+
+    def __init__(self, path, state, pet):
+        self.file = open(path, "w", encoding="utf-8")
+        self.started_at = None
+        self.last_frame = 0.0
+        self.write({"start": {"state": state, "pet": pet_state(pet)}})
+
+    def record(self, now, events):
+        """Log the events handled in the frame that started at `now` (same clock as the simulation)"""
+        if self.started_at is None:
+            self.started_at = now
+        now -= self.started_at
+        recorded = [data for data in map(event_to_dict, events) if data is not None]
+        if recorded:
+            self.write({"t": now, "prev": self.last_frame, "events": recorded})
+        self.last_frame = now
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()  # A crash should still leave the session up to it on disk
+
+    def close(self):
+        self.file.close()
+
+
+def read_input_log(path):
+    """Return (start, frames) where frames is a list of (seconds, previous frame's seconds, [pygame events])"""
+    start = None
+    frames = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "start" in entry:
+                start = entry["start"]
+            else:
+                frames.append((entry["t"], entry.get("prev", entry["t"]),
+                               [event_from_dict(data) for data in entry["events"]]))
+    return start, frames
+
+
+def synthetic_session(hours, clicks, seed=0, mean_gap=60.0):
+    """Make up a session of `hours` of play for soak tests.
+
+    clicks is a dict with the screen positions of the buttons: "play", "start", "feed",
+    "play_action", "sleep" and "play_again". Returns (start, frames) like read_input_log.
+    """
+    rng = random.Random(seed)
+    frame = 1 / 60  # Events are handled against the pet as of one 60 fps frame earlier
+    frames = [
+        (1.0, 1.0 - frame, [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["play"], button=1)]),
+        (3.0, 3.0 - frame, [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["start"], button=1)]),
+    ]
+    actions = [
+        lambda: pygame.event.Event(pygame.KEYDOWN, key=pygame.K_f),
+        lambda: pygame.event.Event(pygame.KEYDOWN, key=pygame.K_p),
+        lambda: pygame.event.Event(pygame.KEYDOWN, key=pygame.K_s),
+        lambda: pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["feed"], button=1),
+        lambda: pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["play_action"], button=1),
+        lambda: pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["sleep"], button=1),
+        lambda: pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["play_again"], button=1),
+        # After Play Again the pet is back on the landing page
+        lambda: pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["play"], button=1),
+        lambda: pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=clicks["start"], button=1),
+    ]
+
+    t = 3.0
+    end = hours * 3600
+    while True:
+        t += rng.expovariate(1 / mean_gap)
+        if t >= end:
+            break
+        frames.append((t, t - frame, [rng.choice(actions)() for _ in range(rng.choice((1, 1, 1, 2, 3)))]))
+    frames.append((end, end - frame, [pygame.event.Event(pygame.QUIT)]))
+    return None, frames
@@ -0,0 +1,134 @@
+# message_cache.py
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+ACTIONS = (None, "fed", "played", "slept")
+
+
+class MessageCache:
+    """LRU/TTL cache of generated pet messages, saved to disk between runs.
+
+    Messages are keyed on mood, action and stats rounded into buckets, so nearby
+    stats share replies. Each key holds a small pool of different replies; once
+    the pool is full, lookups pick one at random instead of calling the API.
+    """
+
+    def __init__(self, path=None, max_keys=1024, pool_size=3, ttl=7 * 24 * 60 * 60, bucket_size=20):
+        self.path = path
+        self.max_keys = max_keys
+        self.pool_size = pool_size
+        self.ttl = ttl  # Seconds before a reply is dropped and regenerated
+        self.bucket_size = bucket_size
+        self.entries = OrderedDict()  # key -> [[text, created_at], ...], least recently used first
+        self.lock = threading.Lock()  # Lookups come from the speech worker threads
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, mood, hunger, energy, happiness, recent_action=None):
+        buckets = [int(stat // self.bucket_size) for stat in (hunger, energy, happiness)]
+        return "|".join([mood, recent_action or ""] + [str(bucket) for bucket in buckets])
+
+    def get(self, mood, hunger, energy, happiness, recent_action=None):
+        """Return a cached reply, or None if the pool for these stats isn't full yet"""
+        key = self.make_key(mood, hunger, energy, happiness, recent_action)
+        with self.lock:
+            pool = self._live_pool(key)
+            if pool is None or len(pool) < self.pool_size:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return random.choice(pool)[0]
+
+    def add(self, mood, hunger, energy, happiness, recent_action, text):
+        key = self.make_key(mood, hunger, energy, happiness, recent_action)
+        with self.lock:
+            pool = self._live_pool(key)
+            if pool is None:
+                pool = self.entries[key] = []
+            if len(pool) < self.pool_size and all(text != existing for existing, _ in pool):
+                pool.append([text, time.time()])
+                self.dirty = True
+            self.entries.move_to_end(key)
+
+            # Evict least recently used keys
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+
+    def fetch(self, generate_func, mood, hunger, energy, happiness, recent_action=None):
+        """Return a cached reply or generate and store a new one. Errors from generate_func propagate."""
+        text = self.get(mood, hunger, energy, happiness, recent_action)
+        if text is None:
+            text = generate_func(mood, hunger, energy, happiness, recent_action)
+            self.add(mood, hunger, energy, happiness, recent_action, text)
+        return text
+
+    def _live_pool(self, key):
+        pool = self.entries.get(key)
+        if pool is None:
+            return None
+        oldest_allowed = time.time() - self.ttl
+        fresh = [entry for entry in pool if entry[1] >= oldest_allowed]
+        if len(fresh) != len(pool):
+            pool[:] = fresh
+            self.dirty = True
+        return pool
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load message cache: {e}")
+            return
+        with self.lock:
+            self.entries = OrderedDict((key, pool) for key, pool in stored.items())
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+            self.dirty = False
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        with self.lock:
+            snapshot = dict(self.entries)
+            self.dirty = False
+        # Write to a temp file first so a crash never leaves a half-written cache
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, self.path)
+
+    def prewarm(self, generate_func, mood_func):
+        """Fill every pool offline. mood_func(hunger, energy, happiness) picks the mood for each bucket."""
+        stat_buckets = range(int(101 // self.bucket_size) + 1)
+        filled = 0
+        for hunger_bucket in stat_buckets:
+            for energy_bucket in stat_buckets:
+                for happiness_bucket in stat_buckets:
+                    # Use the middle of each bucket, capped to the stat range
+                    hunger, energy, happiness = [
+                        min(100, (bucket + 0.5) * self.bucket_size)
+                        for bucket in (hunger_bucket, energy_bucket, happiness_bucket)
+                    ]
+                    mood = mood_func(hunger, energy, happiness)
+                    for action in ACTIONS:
+                        for _ in range(self.pool_size * 2):  # Duplicates are skipped, so allow a few extra tries
+                            key = self.make_key(mood, hunger, energy, happiness, action)
+                            if len(self.entries.get(key, ())) >= self.pool_size:
+                                break
+                            try:
+                                self.fetch(generate_func, mood, hunger, energy, happiness, action)
+                            except Exception as e:
+                                print(f"Prewarm request failed: {e}")
+                                break
+                            filled += 1
+        self.save()
+        return filled
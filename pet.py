@@ -1,15 +1,42 @@
 # pet.py
-class Pet:
-    def __init__(self, name="Fluffy"):
-        self.name = name
-        self.hunger = 50
-        self.energy = 50
-        self.happiness = 50
-        self.current_mood = "happy"
-        self.speech_bubble_text = ""
-        self.speech_bubble_timer = 0
-        self.max_friendship_achieved = False
-        self.congrats_popup_timer = 0
+import math
+
+# The simulation runs in fixed ticks of real time, independent of the frame rate
+TICK_RATE = 60  # Ticks per second
+BUBBLE_TICKS = 3 * TICK_RATE  # Speech bubbles stay up for 3 seconds
+
+# Per-tick stat decay
+HUNGER_RATE = 0.01
+ENERGY_RATE = 0.005
+HAPPINESS_RATE = 0.007
+
+# Stats only ever move in steps of 0.001, but adding the rates up tick by tick (update) and
+# multiplying them out (stats_after) drift apart by a few ulps. Mood thresholds and max
+# friendship are compared with this much slack, so both land on the same side of them.
+STAT_EPSILON = 1e-6
+
+# Every mood get_mood() can return. Index in this tuple is the mood's code in PetPopulation.
+MOODS = ("happy", "hungry", "tired", "sad", "excited")
+
+# Static messages shown when no AI text is available (or while it loads)
+MOOD_MESSAGES = {
+    "hungry": "I'm so hungry! :(",
+    "tired": "I need a nap...",
+    "sad": "I'm feeling lonely... :'(",
+    "excited": "This is amazing!",
+    "happy": "I'm feeling great! :DDD"
+}
+
+ACTION_MESSAGES = {
+    "fed": "Yum! Thanks for the food! :)",
+    "played": "That was so fun! :D",
+    "slept": "I feel so much better now! Zzz..."
+}
+
+
+class PetBehavior:
+    """Everything a pet does. Subclasses decide where the fields are stored."""
+    __slots__ = ()
 
     def feed(self):
         self.hunger = max(0, self.hunger - 20)
@@ -23,9 +50,9 @@ class Pet:
 
     def update(self, ai_message_func=None):
         # Stats decay over time
-        self.hunger = min(100, self.hunger + 0.01)
-        self.energy = max(0, self.energy - 0.005)
-        self.happiness = max(0, self.happiness - 0.007)
+        self.hunger = min(100, self.hunger + HUNGER_RATE)
+        self.energy = max(0, self.energy - ENERGY_RATE)
+        self.happiness = max(0, self.happiness - HAPPINESS_RATE)
         
         # Check for mood changes and show speech bubble
         new_mood = self.get_mood()
@@ -38,56 +65,179 @@ class Pet:
             self.speech_bubble_timer -= 1
         
         # Check for max friendship achievement
-        if self.happiness >= 100 and not self.max_friendship_achieved:
+        if self.happiness >= 100 - STAT_EPSILON and not self.max_friendship_achieved:
             self.max_friendship_achieved = True
             self.congrats_popup_timer = 1  # Set to 1 to show popup, won't auto-decrease
         
         # Don't decrease congratulations popup timer - let it stay until user clicks Play Again
 
+    def advance(self, seconds, ai_message_func=None):
+        """Move the pet forward by `seconds` of game time, e.g. after the window was minimized"""
+        self.advance_ticks(round(seconds * TICK_RATE), ai_message_func)
+
+    def advance_ticks(self, ticks, ai_message_func=None):
+        """Same result as calling update() `ticks` times, but in a handful of steps however large `ticks` is.
+
+        Mood, timers and flags match exactly, stats to within float rounding (see
+        STAT_EPSILON). The one other difference: speech is
+        only requested for a bubble that would still be up at the end, so the
+        bubble text and speech_request_id can differ when a mood change is skipped over.
+        """
+        if ticks <= 0:
+            return
+
+        # A normal first tick picks up a mood change or max friendship left over from the last action.
+        # After that happiness only falls, so neither can happen except at a predicted mood change.
+        self.update(ai_message_func)
+        ticks -= 1
+
+        while ticks > 0:
+            # Stats move in straight lines, so jump straight to the next mood change
+            mood, until = self.predict_next_mood()
+            step = ticks if mood is None else min(ticks, until)
+            self.hunger, self.energy, self.happiness = self.stats_after(step)
+            self.speech_bubble_timer = max(0, self.speech_bubble_timer - step)
+            ticks -= step
+
+            new_mood = self.get_mood()
+            if new_mood != self.current_mood:
+                self.current_mood = new_mood
+                # Only ask for speech if the bubble would still be up at the end
+                if ticks < BUBBLE_TICKS - 1:
+                    self.show_speech_bubble(new_mood, ai_message_func)
+                    self.speech_bubble_timer -= 1  # update() counts down on the tick the bubble appears
+
     def get_mood(self):
-        # Priority-based mood system using all stats
-        
-        # Critical needs first
-        if self.hunger > 75:
-            return "hungry"
-        elif self.energy < 20:
-            return "tired"
-        
-        # Emotional states based on overall wellbeing
-        elif self.happiness < 30:
-            return "sad"
-        elif self.happiness > 80 and self.energy > 70 and self.hunger < 40:
-            return "excited"
-        else:
-            return "happy"
-    
+        return mood_for(self.hunger, self.energy, self.happiness)
+
+    def stats_after(self, ticks):
+        """Hunger, energy and happiness after `ticks` more updates with no actions"""
+        return (min(100, self.hunger + HUNGER_RATE * ticks),
+                max(0, self.energy - ENERGY_RATE * ticks),
+                max(0, self.happiness - HAPPINESS_RATE * ticks))
+
+    def predict_next_mood(self):
+        """Return (mood, ticks) for the next mood change if left alone, or (None, None) if it never changes"""
+        # Stats move in straight lines, so the mood can only change where one of
+        # them crosses a get_mood threshold. Check those ticks in order.
+        crossings = [
+            _ticks_until(self.hunger, 75, HUNGER_RATE, inclusive=False),     # becomes hungry
+            _ticks_until(self.hunger, 40, HUNGER_RATE, inclusive=True),      # no longer excited
+            _ticks_until(-self.energy, -20, ENERGY_RATE, inclusive=False),   # becomes tired
+            _ticks_until(-self.energy, -70, ENERGY_RATE, inclusive=True),    # no longer excited
+            _ticks_until(-self.happiness, -30, HAPPINESS_RATE, inclusive=False),  # becomes sad
+            _ticks_until(-self.happiness, -80, HAPPINESS_RATE, inclusive=True),   # no longer excited
+        ]
+        current = self.get_mood()
+        for ticks in sorted(t for t in crossings if t is not None):
+            # Check the ticks either side too, in case float drift moves the crossing by one
+            for candidate in (ticks - 1, ticks, ticks + 1):
+                if candidate < 1:
+                    continue
+                mood = mood_for(*self.stats_after(candidate))
+                if mood != current:
+                    return mood, candidate
+        return None, None
+
+    def ticks_until_visible_change(self):
+        """Ticks until something shown for the pet changes if left alone (a stat's whole number,
+        the mood or the speech bubble), or None if nothing ever will"""
+        if self.get_mood() != self.current_mood or (self.happiness >= 100 - STAT_EPSILON and not self.max_friendship_achieved):
+            return 1  # The next update() catches up on the last action
+
+        candidates = [self.predict_next_mood()[1]]
+        if self.hunger < 100:
+            candidates.append(_ticks_until(self.hunger, math.floor(self.hunger) + 1, HUNGER_RATE, inclusive=True))
+        # Energy and happiness fall, so their whole number drops as soon as they go below it (and stops at 0)
+        if self.energy >= 1:
+            candidates.append(_ticks_until(-self.energy, -math.floor(self.energy), ENERGY_RATE, inclusive=False))
+        if self.happiness >= 1:
+            candidates.append(_ticks_until(-self.happiness, -math.floor(self.happiness), HAPPINESS_RATE, inclusive=False))
+        if self.speech_bubble_timer > 0:
+            candidates.append(self.speech_bubble_timer)
+
+        candidates = [ticks for ticks in candidates if ticks is not None]
+        return min(candidates) if candidates else None
+
     def show_speech_bubble(self, mood, ai_message_func=None):
-        if ai_message_func:
-            # Use AI-generated message
-            self.speech_bubble_text = ai_message_func(mood, self.hunger, self.energy, self.happiness)
-        else:
-            # Fallback to static messages
-            mood_messages = {
-                "hungry": "I'm so hungry! :(",
-                "tired": "I need a nap...",
-                "sad": "I'm feeling lonely... :'(",
-                "excited": "This is amazing!",
-                "happy": "I'm feeling great! :DDD"
-            }
-            self.speech_bubble_text = mood_messages.get(mood, "Hello!")
-        
-        self.speech_bubble_timer = 180  # Show for 3 seconds at 60 FPS
+        fallback = MOOD_MESSAGES.get(mood, "Hello!")
+        self._request_message(ai_message_func, fallback, mood, self.hunger, self.energy, self.happiness)
+        self.speech_bubble_timer = BUBBLE_TICKS
     
     def show_action_response(self, action, ai_message_func=None):
         """Show a response to a specific action like feeding, playing, or sleeping"""
-        if ai_message_func:
-            self.speech_bubble_text = ai_message_func(self.get_mood(), self.hunger, self.energy, self.happiness, action)
+        fallback = ACTION_MESSAGES.get(action, "Thanks!")
+        self._request_message(ai_message_func, fallback, self.get_mood(), self.hunger, self.energy, self.happiness, action)
+        self.speech_bubble_timer = BUBBLE_TICKS
+
+    def receive_speech(self, request_id, text, restart_timer=False):
+        """Swap in an AI reply that arrived after the bubble was shown.
+
+        restart_timer gives the bubble its full display time again, from now.
+        """
+        if request_id != self.speech_request_id:
+            return False  # A newer bubble has replaced the one this reply was for
+        self.speech_bubble_text = text
+        if restart_timer:
+            self.speech_bubble_timer = BUBBLE_TICKS
+        return True
+
+    def _request_message(self, ai_message_func, fallback, *message_args):
+        self.speech_request_id += 1
+
+        if ai_message_func is None:
+            self.speech_bubble_text = fallback
+        elif hasattr(ai_message_func, "submit"):
+            # Background generator: show the static text now, the AI text is delivered later
+            self.speech_bubble_text = fallback
+            ai_message_func.submit(self, self.speech_request_id, *message_args)
         else:
-            action_messages = {
-                "fed": "Yum! Thanks for the food! :)",
-                "played": "That was so fun! :D",
-                "slept": "I feel so much better now! Zzz..."
-            }
-            self.speech_bubble_text = action_messages.get(action, "Thanks!")
-        
-        self.speech_bubble_timer = 180
\ No newline at end of file
+            # Plain function: blocks until the message is ready
+            self.speech_bubble_text = ai_message_func(*message_args)
+
+
+
+class Pet(PetBehavior):
+    # Fixed slots instead of a per-instance __dict__ keep each pet small
+    __slots__ = ("name", "hunger", "energy", "happiness", "current_mood", "speech_bubble_text",
+                 "speech_bubble_timer", "speech_request_id", "max_friendship_achieved", "congrats_popup_timer")
+
+    def __init__(self, name="Fluffy"):
+        self.name = name
+        self.hunger = 50
+        self.energy = 50
+        self.happiness = 50
+        self.current_mood = "happy"
+        self.speech_bubble_text = ""
+        self.speech_bubble_timer = 0
+        self.speech_request_id = 0  # Bumped on every new bubble so late AI replies can be discarded
+        self.max_friendship_achieved = False
+        self.congrats_popup_timer = 0
+
+def mood_for(hunger, energy, happiness):
+    # Priority-based mood system using all stats
+
+    # Critical needs first
+    if hunger > 75 + STAT_EPSILON:
+        return "hungry"
+    elif energy < 20 - STAT_EPSILON:
+        return "tired"
+
+    # Emotional states based on overall wellbeing
+    elif happiness < 30 - STAT_EPSILON:
+        return "sad"
+    elif happiness > 80 + STAT_EPSILON and energy > 70 + STAT_EPSILON and hunger < 40 - STAT_EPSILON:
+        return "excited"
+    else:
+        return "happy"
+
+
+def _ticks_until(value, threshold, rate, inclusive):
+    # First tick at which a stat rising by `rate` per tick passes `threshold`
+    # (reaches it if inclusive, goes above it otherwise)
+    if value > threshold or (inclusive and value == threshold):
+        return None  # Already past it
+    ticks = (threshold - value) / rate
+    if inclusive:
+        return max(1, math.ceil(ticks))
+    return max(1, math.floor(ticks) + 1)
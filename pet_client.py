@@ -0,0 +1,83 @@
+# pet_client.py
+import json
+import socket
+from pet import Pet, BUBBLE_TICKS
+
+
+class PetClient:
+    """Thin client for pet_server.py: sends actions and mirrors the server's pet into a local Pet.
+
+    Nothing here blocks the game loop: poll() reads whatever state updates have
+    arrived and applies them to self.pet, which the game then draws as usual.
+    """
+
+    def __init__(self, address, player):
+        host, port = address.rsplit(":", 1)
+        self.sock = socket.create_connection((host, int(port)), timeout=5.0)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.buffer = b""
+        self.pet = Pet()
+        self.connected = True
+        self.bad_lines = 0  # Updates that couldn't be decoded
+        self._send({"hello": player})
+
+    def send(self, action):
+        """Ask the server to feed/play/sleep/restart; the new state arrives through poll()"""
+        self._send({"do": action})
+
+    def poll(self):
+        """Apply the state updates received since the last call. Returns False once the server is gone."""
+        while self.connected:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.connected = False
+                break
+            self.buffer += data
+
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            if not line:
+                continue
+            try:
+                self.apply(json.loads(line)["s"])
+            except (ValueError, KeyError, TypeError):
+                # Skip it rather than crash the game; its fields catch up the next time they change
+                self.bad_lines += 1
+        return self.connected
+
+    def apply(self, state):
+        pet = self.pet
+        if "h" in state:
+            pet.hunger = state["h"]
+        if "e" in state:
+            pet.energy = state["e"]
+        if "p" in state:
+            pet.happiness = state["p"]
+        if "m" in state:
+            pet.current_mood = state["m"]
+        if "t" in state:
+            # The server decides when the bubble goes away, so keep it up until it says so
+            pet.speech_bubble_text = state["t"]
+            pet.speech_bubble_timer = BUBBLE_TICKS if state["t"] else 0
+        if "f" in state:
+            pet.max_friendship_achieved = state["f"]
+        if "c" in state:
+            pet.congrats_popup_timer = 1 if state["c"] else 0
+
+    def close(self):
+        self.sock.close()
+        self.connected = False
+
+    def _send(self, message):
+        if not self.connected:
+            return
+        try:
+            self.sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        except OSError:
+            self.connected = False
@@ -0,0 +1,105 @@
+# pet_loadgen.py
+# Opens many client connections to pet_server.py and sends actions like real players would.
+#
+#   python pet_server.py --no-ai --stats 5 &
+#   python pet_loadgen.py --clients 5000 --seconds 30
+import argparse
+import asyncio
+import json
+import random
+import time
+from pet_server import raise_open_file_limit
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+class Totals:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.actions = 0
+        self.messages = 0
+        self.bytes = 0
+        self.latencies = []  # Seconds from an action to the server's answer
+
+
+async def player(name, host, port, seconds, action_gap, totals, rng):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        totals.failed += 1
+        return
+    totals.connected += 1
+    writer.write(json.dumps({"hello": name}).encode("utf-8") + b"\n")
+
+    sent_at = []  # Times of actions not answered yet
+    end = time.monotonic() + seconds
+
+    async def read():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            totals.messages += 1
+            totals.bytes += len(line)
+            if sent_at:
+                totals.latencies.append(time.monotonic() - sent_at.pop(0))
+
+    reading = asyncio.create_task(read())
+    try:
+        while time.monotonic() < end:
+            await asyncio.sleep(rng.expovariate(1 / action_gap))
+            writer.write(json.dumps({"do": rng.choice(("feed", "play", "sleep"))}).encode("utf-8") + b"\n")
+            sent_at.append(time.monotonic())
+            totals.actions += 1
+    finally:
+        reading.cancel()
+        writer.close()
+
+
+async def run(args):
+    totals = Totals()
+    rng = random.Random(args.seed)
+    tasks = []
+    for i in range(args.clients):
+        tasks.append(asyncio.create_task(
+            player(f"load-{i}", args.host, args.port, args.seconds, args.action_gap, totals, random.Random(rng.random()))))
+        if i % 200 == 199:
+            await asyncio.sleep(0.05)  # Don't overflow the server's accept backlog
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for pet_server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--action-gap", type=float, default=5.0, help="mean seconds between a player's actions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    raise_open_file_limit()
+
+    start = time.monotonic()
+    totals = asyncio.run(run(args))
+    elapsed = time.monotonic() - start
+    latencies = sorted(totals.latencies)
+    print(json.dumps({
+        "connected": totals.connected,
+        "failed": totals.failed,
+        "actions": totals.actions,
+        "messages_per_s": totals.messages / elapsed,
+        "bytes_per_message": totals.bytes / totals.messages if totals.messages else 0,
+        "action_latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
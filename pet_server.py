@@ -0,0 +1,238 @@
+# pet_server.py
+# Hosts many players' pets in one process; "Pet Pal.py" connects to it as a thin client.
+#
+#   python pet_server.py --port 7777
+#   PETPAL_SERVER=127.0.0.1:7777 PETPAL_PLAYER=alice python "Pet Pal.py"
+#
+# Protocol: one JSON object per line, over TCP.
+#   client -> server  {"hello": "<player name>"} first, then {"do": "feed" | "play" | "sleep" | "restart"}
+#   server -> client  {"s": {...}}: the pet's full state after hello, then only the fields that changed
+# State fields have short names to keep pushes small: see pet_state().
+import argparse
+import asyncio
+import json
+import resource
+import time
+from collections import OrderedDict
+from pet import Pet
+from scheduler import PetScheduler
+from sim_clock import SimulationClock
+
+PUSH_RATE = 10  # State pushes per second
+MAX_LINE = 256  # Longest request line accepted, in bytes
+MAX_BUFFERED = 16 * 1024  # Pushes are skipped while this much is still waiting to go out to a client
+MAX_IDLE_PETS = 10000  # Pets kept for players who have disconnected; past this the longest gone are dropped
+
+
+def pet_state(pet, hunger, energy, happiness):
+    """What the client is sent, under short keys. Stats are whole numbers, which is all the client shows."""
+    return {
+        "h": int(hunger),
+        "e": int(energy),
+        "p": int(happiness),
+        "m": pet.current_mood,
+        "t": pet.speech_bubble_text if pet.speech_bubble_timer > 0 else "",
+        "f": pet.max_friendship_achieved,
+        "c": pet.congrats_popup_timer > 0,
+    }
+
+
+def raise_open_file_limit():
+    # Every connection is a file descriptor; the default soft limit is often only 1024
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+class Connection:
+    __slots__ = ("writer", "player", "sent")
+
+    def __init__(self, writer, player):
+        self.writer = writer
+        self.player = player
+        self.sent = {}  # State the client has been sent, to work out the next delta
+
+
+class PetServer:
+    """Owns every player's pet and ticks them on its own clock.
+
+    Pets live in a PetScheduler, so idle pets cost nothing between events, and
+    stay around when their player disconnects, up to max_idle_pets of them;
+    past that the pets of the players gone longest are dropped. ai_message_func
+    is handed to the pets as usual; pass a SpeechWorker to generate speech in
+    the background (requests from many pets are then batched by the AI broker). Every
+    1/PUSH_RATE seconds the clock advances and each connected client gets the
+    fields of its pet that changed since its last push.
+    """
+
+    def __init__(self, ai_message_func=None, push_rate=PUSH_RATE, max_idle_pets=MAX_IDLE_PETS):
+        self.ai_message_func = ai_message_func
+        self.push_rate = push_rate
+        self.max_idle_pets = max_idle_pets
+        self.scheduler = PetScheduler(ai_message_func)
+        self.sim_clock = SimulationClock(time_func=time.monotonic)
+        self.players = {}  # Player name -> pet id
+        self.connections = set()
+        self.online = {}  # Player name -> open connections
+        self.idle = OrderedDict()  # Players with a pet but no connection, longest gone first
+        self.pushes = 0
+        self.bytes_sent = 0
+        self.slowest_step = 0.0
+
+    async def serve(self, host="127.0.0.1", port=7777):
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE, backlog=4096)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.run_clock())
+
+    async def run_clock(self):
+        interval = 1 / self.push_rate
+        next_step = time.monotonic()
+        while True:
+            next_step += interval
+            await asyncio.sleep(max(0.0, next_step - time.monotonic()))
+            start = time.perf_counter()
+            self.step()
+            self.slowest_step = max(self.slowest_step, time.perf_counter() - start)
+
+    def step(self):
+        self.scheduler.advance(self.sim_clock.elapsed_ticks())
+        poll = getattr(self.ai_message_func, "poll", None)
+        if poll is not None:
+            poll()  # Deliver finished AI speech to its pets
+        for connection in self.connections:
+            self.push(connection)
+
+    def push(self, connection):
+        transport = connection.writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > MAX_BUFFERED:
+            return  # Slow client: skip, the next push carries everything it missed
+        state = pet_state(*self.scheduler.stats(self.players[connection.player]))
+        delta = {key: value for key, value in state.items() if connection.sent.get(key) != value}
+        if not delta:
+            return
+        data = json.dumps({"s": delta}, separators=(",", ":")).encode("utf-8") + b"\n"
+        connection.writer.write(data)
+        connection.sent.update(delta)
+        self.pushes += 1
+        self.bytes_sent += len(data)
+
+    def pet_for(self, player):
+        pet_id = self.players.get(player)
+        if pet_id is None:
+            pet_id = self.players[player] = self.scheduler.add()
+        return pet_id
+
+    def act(self, player, action):
+        pet_id = self.pet_for(player)
+        if action == "feed":
+            self.scheduler.feed(pet_id)
+        elif action == "play":
+            self.scheduler.play(pet_id)
+        elif action == "sleep":
+            self.scheduler.sleep(pet_id)
+        elif action == "restart":
+            self.remove_pet(pet_id)
+            self.players[player] = self.scheduler.add(Pet())
+
+    def remove_pet(self, pet_id):
+        forget = getattr(self.ai_message_func, "forget", None)
+        if forget is not None:
+            forget(self.scheduler.get(pet_id))
+        self.scheduler.remove(pet_id)
+
+    def connected(self, player):
+        self.idle.pop(player, None)
+        self.online[player] = self.online.get(player, 0) + 1
+
+    def disconnected(self, player):
+        self.online[player] -= 1
+        if self.online[player]:
+            return  # Still playing from another connection
+        del self.online[player]
+        self.idle[player] = None
+        while len(self.idle) > self.max_idle_pets:
+            gone, _ = self.idle.popitem(last=False)
+            self.remove_pet(self.players.pop(gone))
+
+    async def handle_client(self, reader, writer):
+        connection = None
+        try:
+            hello = json.loads(await reader.readline())
+            player = str(hello["hello"])[:64]
+            self.pet_for(player)
+            connection = Connection(writer, player)
+            self.connections.add(connection)
+            self.connected(player)
+            self.push(connection)
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                action = json.loads(line).get("do")
+                if action in ("feed", "play", "sleep", "restart"):
+                    self.act(player, action)
+                    self.push(connection)  # Answer actions right away rather than on the next tick
+        except (ValueError, KeyError, TypeError, AttributeError, ConnectionError, asyncio.LimitOverrunError):
+            pass  # Malformed request or the client went away: drop the connection
+        finally:
+            if connection is not None:
+                self.connections.discard(connection)
+                self.disconnected(connection.player)
+            writer.close()
+
+    def stats(self):
+        return {
+            "connections": len(self.connections),
+            "pets": len(self.scheduler.pets),
+            "idle_pets": len(self.idle),
+            "pushes": self.pushes,
+            "bytes_sent": self.bytes_sent,
+            "slowest_step_ms": self.slowest_step * 1000,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+
+
+async def report(server, every):
+    while True:
+        await asyncio.sleep(every)
+        print(json.dumps(server.stats()), flush=True)
+        server.slowest_step = 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pet Pal server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--no-ai", action="store_true", help="static messages only, no OpenAI calls")
+    parser.add_argument("--stats", type=float, default=0, help="print server stats every this many seconds")
+    args = parser.parse_args()
+    raise_open_file_limit()
+
+    worker = None
+    if not args.no_ai:
+        from ai_messages import generate_ai_message, message_cache, AI_LATENCY_BUDGET
+        from speech_worker import SpeechWorker
+        # Plenty of workers so requests from many pets meet in the broker's batching window
+        worker = SpeechWorker(generate_ai_message, timeout=AI_LATENCY_BUDGET, max_workers=32, cache=message_cache)
+    server = PetServer(worker)
+
+    async def run():
+        tasks = [server.serve(args.host, args.port)]
+        if args.stats:
+            tasks.append(report(server, args.stats))
+        await asyncio.gather(*tasks)
+
+    print(f"Serving pets on {args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if worker is not None:
+            worker.shutdown()
+            message_cache.save()
+
+
+if __name__ == "__main__":
+    main()
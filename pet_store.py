@@ -0,0 +1,97 @@
+# pet_store.py
+from array import array
+from pet import PetBehavior, MOODS
+
+DEFAULT_NAME = "Fluffy"
+
+
+class PetStore:
+    """Keeps the fields of many pets in shared typed arrays, one entry per pet.
+
+    store[i] returns a PetView, a tiny object that behaves exactly like a Pet
+    (same fields and methods) but reads and writes the arrays. Views are cheap
+    to make, so only keep them around for pets you are working with; the
+    arrays alone are what each pet costs.
+    """
+
+    def __init__(self):
+        self.hunger = array("d")
+        self.energy = array("d")
+        self.happiness = array("d")
+        self.mood = array("b")  # Index into pet.MOODS
+        self.speech_bubble_timer = array("h")
+        self.speech_request_id = array("I")
+        self.max_friendship_achieved = array("b")
+        self.congrats_popup_timer = array("b")
+        self.speech_bubble_text = []  # References to (mostly shared) message strings
+        self.names = {}  # Only pets not called DEFAULT_NAME are listed
+
+    def add(self, name=DEFAULT_NAME):
+        index = len(self.hunger)
+        for stat in (self.hunger, self.energy, self.happiness):
+            stat.append(50.0)
+        self.mood.append(MOODS.index("happy"))
+        self.speech_bubble_timer.append(0)
+        self.speech_request_id.append(0)
+        self.max_friendship_achieved.append(0)
+        self.congrats_popup_timer.append(0)
+        self.speech_bubble_text.append("")
+        if name != DEFAULT_NAME:
+            self.names[index] = name
+        return PetView(self, index)
+
+    def __len__(self):
+        return len(self.hunger)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self.hunger):
+            raise IndexError("pet index out of range")
+        return PetView(self, index)
+
+
+def _stored(field, load=lambda value: value, save=lambda value: value):
+    # Property that reads and writes this pet's entry in one of the store's arrays
+    def get(view):
+        return load(getattr(view.store, field)[view.index])
+
+    def set(view, value):
+        getattr(view.store, field)[view.index] = save(value)
+
+    return property(get, set)
+
+
+class PetView(PetBehavior):
+    """A Pet whose fields live in a PetStore"""
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    hunger = _stored("hunger")
+    energy = _stored("energy")
+    happiness = _stored("happiness")
+    current_mood = _stored("mood", load=MOODS.__getitem__, save=MOODS.index)
+    speech_bubble_text = _stored("speech_bubble_text")
+    speech_bubble_timer = _stored("speech_bubble_timer")
+    speech_request_id = _stored("speech_request_id")
+    max_friendship_achieved = _stored("max_friendship_achieved", load=bool, save=int)
+    congrats_popup_timer = _stored("congrats_popup_timer")
+
+    @property
+    def name(self):
+        return self.store.names.get(self.index, DEFAULT_NAME)
+
+    @name.setter
+    def name(self, value):
+        if value == DEFAULT_NAME:
+            self.store.names.pop(self.index, None)
+        else:
+            self.store.names[self.index] = value
+
+    # Views of the same pet are interchangeable, e.g. as keys in SpeechWorker
+    def __eq__(self, other):
+        return isinstance(other, PetView) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
@@ -0,0 +1,128 @@
+# population.py
+import numpy as np
+from pet import MOODS, BUBBLE_TICKS, HUNGER_RATE, ENERGY_RATE, HAPPINESS_RATE, STAT_EPSILON
+
+HAPPY, HUNGRY, TIRED, SAD, EXCITED = (MOODS.index(mood) for mood in ("happy", "hungry", "tired", "sad", "excited"))
+
+# Every per-pet array: name, dtype and starting value
+FIELDS = (
+    ("hunger", np.float64, 50.0),
+    ("energy", np.float64, 50.0),
+    ("happiness", np.float64, 50.0),
+    ("current_mood", np.int8, HAPPY),
+    ("speech_bubble_timer", np.int16, 0),
+    ("max_friendship_achieved", np.bool_, False),
+    ("congrats_popup_timer", np.int8, 0),
+)
+
+
+class PetPopulation:
+    """Many pets stored as NumPy arrays, one entry per pet.
+
+    Follows the same rules as Pet.feed/play/sleep/update/get_mood, including
+    the clamps and the 101 happiness cap, but steps every pet at once. Moods
+    are stored as indexes into pet.MOODS. Speech text is left to the caller:
+    update() returns which pets changed mood so their speech can be generated.
+
+    Pass arrays ({name: array} for every name in FIELDS) to work on existing
+    storage, e.g. a slice of shared memory, instead of allocating new arrays.
+    """
+
+    def __init__(self, count, arrays=None):
+        self.count = count
+        for name, dtype, initial in FIELDS:
+            if arrays is None:
+                setattr(self, name, np.full(count, initial, dtype=dtype))
+            else:
+                setattr(self, name, arrays[name])
+
+        # Scratch space reused every tick so stepping allocates as little as possible
+        self._mood = np.empty(count, dtype=np.int8)
+        self._mask = np.empty(count, dtype=bool)
+        self._other_mask = np.empty(count, dtype=bool)
+
+    def feed(self, indices):
+        self._apply(indices, self._feed)
+
+    def play(self, indices):
+        self._apply(indices, self._play)
+
+    def sleep(self, indices):
+        self._apply(indices, self._sleep)
+
+    def update(self):
+        """Step every pet by one tick. Returns (pets whose mood changed, pets that just hit max friendship)."""
+        # Stats decay over time
+        np.add(self.hunger, HUNGER_RATE, out=self.hunger)
+        np.minimum(self.hunger, 100, out=self.hunger)
+        np.subtract(self.energy, ENERGY_RATE, out=self.energy)
+        np.maximum(self.energy, 0, out=self.energy)
+        np.subtract(self.happiness, HAPPINESS_RATE, out=self.happiness)
+        np.maximum(self.happiness, 0, out=self.happiness)
+
+        # Check for mood changes and show speech bubble
+        mood = self.get_mood(out=self._mood)
+        np.not_equal(mood, self.current_mood, out=self._mask)
+        mood_changed = np.flatnonzero(self._mask)
+        if len(mood_changed):
+            self.current_mood[mood_changed] = mood[mood_changed]
+            self.speech_bubble_timer[mood_changed] = BUBBLE_TICKS
+
+        # Decrease speech bubble timer
+        np.subtract(self.speech_bubble_timer, 1, out=self.speech_bubble_timer)
+        np.maximum(self.speech_bubble_timer, 0, out=self.speech_bubble_timer)
+
+        # Check for max friendship achievement
+        np.greater_equal(self.happiness, 100 - STAT_EPSILON, out=self._mask)
+        np.greater(self._mask, self.max_friendship_achieved, out=self._mask)  # Reached it and not flagged yet
+        reached = np.flatnonzero(self._mask)
+        if len(reached):
+            self.max_friendship_achieved[reached] = True
+            self.congrats_popup_timer[reached] = 1
+
+        return mood_changed, reached
+
+    def get_mood(self, out=None):
+        """Mood code for every pet, same priority order as Pet.get_mood"""
+        if out is None:
+            out = np.empty(self.count, dtype=np.int8)
+        mask, other = self._mask, self._other_mask
+
+        # Fill lowest priority first so higher priority moods overwrite it
+        out.fill(HAPPY)
+        np.greater(self.happiness, 80 + STAT_EPSILON, out=mask)
+        np.greater(self.energy, 70 + STAT_EPSILON, out=other)
+        np.logical_and(mask, other, out=mask)
+        np.less(self.hunger, 40 - STAT_EPSILON, out=other)
+        np.logical_and(mask, other, out=mask)
+        np.putmask(out, mask, EXCITED)
+
+        np.less(self.happiness, 30 - STAT_EPSILON, out=mask)
+        np.putmask(out, mask, SAD)
+        np.less(self.energy, 20 - STAT_EPSILON, out=mask)
+        np.putmask(out, mask, TIRED)
+        np.greater(self.hunger, 75 + STAT_EPSILON, out=mask)
+        np.putmask(out, mask, HUNGRY)
+        return out
+
+    def mood_name(self, index):
+        return MOODS[self.current_mood[index]]
+
+    def _apply(self, indices, action):
+        indices = np.asarray(indices, dtype=np.intp)
+        if indices.size == 0:
+            return
+        # A pet listed k times gets the action k times in a row, same as k separate calls
+        unique, counts = np.unique(indices, return_counts=True)
+        for repeat in range(1, counts.max() + 1):
+            action(unique[counts >= repeat])
+
+    def _feed(self, idx):
+        self.hunger[idx] = np.maximum(0, self.hunger[idx] - 20)
+
+    def _play(self, idx):
+        self.happiness[idx] = np.minimum(101, self.happiness[idx] + 20)  # Max happiness is 101
+        self.energy[idx] = np.maximum(0, self.energy[idx] - 10)
+
+    def _sleep(self, idx):
+        self.energy[idx] = np.minimum(100, self.energy[idx] + 25)
@@ -0,0 +1,151 @@
+# profiler.py
+import json
+import time
+from collections import deque
+import pygame
+
+# Frame time histogram buckets for the overlay, in milliseconds
+HISTOGRAM_BUCKETS = ((0, 4), (4, 8), (8, 16), (16, 33), (33, float("inf")))
+
+IDLE_PHASE = "idle"  # Time spent waiting for the next frame, left out of the worst offenders
+OVERLAY_REFRESH_FRAMES = 15  # Overlay contents are recomputed every this many frames
+
+
+class FrameProfiler:
+    """Records how long each phase of every frame takes, in a ring buffer of recent frames.
+
+    Call begin_frame() at the top of the loop, mark(phase) after each phase and
+    end_frame() at the bottom. While disabled every call returns immediately.
+    Showing the overlay enables recording until it is hidden again.
+    """
+
+    def __init__(self, capacity=600, enabled=False):
+        self.enabled = enabled
+        self.always_enabled = enabled  # Recording asked for at startup, kept on when the overlay closes
+        self.overlay_visible = False
+        self.frames = deque(maxlen=capacity)  # Each frame: (start, [(phase, start, duration), ...])
+        self.current = None
+        self.last_mark = 0.0
+        self.frame_count = 0
+        self.overlay_cache = (None, None)  # (refresh number, rendered overlay)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.last_mark = time.perf_counter()
+        self.current = (self.last_mark, [])
+
+    def mark(self, phase):
+        """Record the time since the previous mark as `phase`. A phase can be marked more than once per frame."""
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        self.current[1].append((phase, self.last_mark, now - self.last_mark))
+        self.last_mark = now
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        self.frames.append(self.current)
+        self.current = None
+        self.frame_count += 1
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.enabled = self.overlay_visible or self.always_enabled
+
+    def frame_times(self):
+        # Milliseconds per recorded frame
+        return [sum(duration for _, _, duration in phases) * 1000 for _, phases in self.frames]
+
+    def phase_stats(self):
+        """Per-phase {"total", "mean", "max"} in milliseconds, summed within each frame"""
+        per_phase = {}
+        for _, phases in self.frames:
+            frame_totals = {}
+            for phase, _, duration in phases:
+                frame_totals[phase] = frame_totals.get(phase, 0.0) + duration
+            for phase, duration in frame_totals.items():
+                per_phase.setdefault(phase, []).append(duration * 1000)
+        return {
+            phase: {"total": sum(times), "mean": sum(times) / len(times), "max": max(times)}
+            for phase, times in per_phase.items()
+        }
+
+    def fps(self):
+        if len(self.frames) < 2:
+            return 0.0
+        span = self.frames[-1][0] - self.frames[0][0]
+        return (len(self.frames) - 1) / span if span > 0 else 0.0
+
+    def export_json(self, path):
+        frame_times = sorted(self.frame_times())
+        summary = {
+            "frames": len(frame_times),
+            "fps": self.fps(),
+            "frame_ms": {
+                "p50": frame_times[len(frame_times) // 2] if frame_times else 0.0,
+                "p95": frame_times[int(len(frame_times) * 0.95)] if frame_times else 0.0,
+                "p99": frame_times[int(len(frame_times) * 0.99)] if frame_times else 0.0,
+                "max": frame_times[-1] if frame_times else 0.0,
+            },
+            "phases": self.phase_stats(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    def export_chrome_trace(self, path):
+        """Write the recorded frames in Chrome's trace event format (open in chrome://tracing or Perfetto)"""
+        events = []
+        for frame_start, phases in self.frames:
+            frame_end = phases[-1][1] + phases[-1][2] if phases else frame_start
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": frame_start * 1e6, "dur": (frame_end - frame_start) * 1e6})
+            for phase, start, duration in phases:
+                events.append({"name": phase, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": start * 1e6, "dur": duration * 1e6})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def overlay_version(self):
+        # Changes whenever the overlay needs redrawing
+        return self.frame_count // OVERLAY_REFRESH_FRAMES
+
+    def draw_overlay(self, surface, font, rect):
+        """Draw FPS, a frame time histogram and the slowest phases inside rect"""
+        version, overlay = self.overlay_cache
+        if version != self.overlay_version() or overlay is None or overlay.get_size() != rect.size:
+            overlay = self._render_overlay(font, rect.size)
+            self.overlay_cache = (self.overlay_version(), overlay)
+        surface.blit(overlay, rect)
+
+    def _render_overlay(self, font, size):
+        overlay = pygame.Surface(size, pygame.SRCALPHA)
+        overlay.fill((20, 20, 20, 200))
+        rect = overlay.get_rect()
+
+        frame_times = self.frame_times()
+        lines = [f"FPS: {self.fps():.0f}   frames: {len(frame_times)}"]
+
+        # Histogram, one bar per bucket
+        counts = [sum(1 for t in frame_times if low <= t < high) for low, high in HISTOGRAM_BUCKETS]
+        most = max(counts) if counts and max(counts) else 1
+        bar_top = rect.y + 40
+        for i, ((low, high), count) in enumerate(zip(HISTOGRAM_BUCKETS, counts)):
+            label = f"{low}+ ms" if high == float("inf") else f"{low}-{high} ms"
+            y = bar_top + i * 22
+            overlay.blit(font.render(label, True, (255, 255, 255)), (rect.x + 10, y))
+            color = (100, 200, 100) if high <= 16 else (230, 80, 60)
+            pygame.draw.rect(overlay, color, (rect.x + 110, y + 3, int((rect.width - 130) * count / most), 14))
+
+        # Worst offenders: phases with the slowest single frame
+        busy = [item for item in self.phase_stats().items() if item[0] != IDLE_PHASE]
+        worst = sorted(busy, key=lambda item: item[1]["max"], reverse=True)[:3]
+        for phase, stats in worst:
+            lines.append(f"{phase}: max {stats['max']:.1f} ms, mean {stats['mean']:.2f} ms")
+
+        overlay.blit(font.render(lines[0], True, (255, 255, 255)), (rect.x + 10, rect.y + 12))
+        for i, line in enumerate(lines[1:]):
+            y = bar_top + len(HISTOGRAM_BUCKETS) * 22 + 8 + i * 22
+            overlay.blit(font.render(line, True, (255, 255, 255)), (rect.x + 10, y))
+        return overlay
@@ -0,0 +1,132 @@
+# replay.py
+# Plays back a recorded input log (PETPAL_RECORD=<file> python "Pet Pal.py") headless and
+# as fast as the CPU allows, then prints the final pet state.
+#
+#   python replay.py session.jsonl
+#   python replay.py --synthetic-hours 10 --repeat 3      # soak test, checks every run ends the same
+#   python replay.py session.jsonl --render --frame-step 0.5
+import argparse
+import hashlib
+import json
+import sys
+import time
+
+from benchmark import load_game
+from ai_messages import static_message
+from input_log import read_input_log, synthetic_session, pet_state, apply_pet_state
+
+
+class ReplayAI:
+    """Stands in for the speech worker: answers right away with the static messages, so replays are deterministic"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, mood, hunger, energy, happiness, recent_action=None):
+        self.calls += 1
+        return static_message(mood, recent_action)
+
+    def poll(self):
+        pass
+
+    def prefetch(self, pet, lead_ticks=600):
+        pass
+
+    def forget(self, pet):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+def button_clicks(game):
+    # Where synthetic sessions click
+    return {
+        "play": game.play_button_rect.center,
+        "start": game.start_game_button_rect.center,
+        "feed": game.feed_button_rect.center,
+        "play_action": game.action_play_button_rect.center,
+        "sleep": game.sleep_button_rect.center,
+        "play_again": game.play_again_button_rect.center,
+    }
+
+
+def replay(game, start, frames, render=False, frame_step=None):
+    """Run the recorded frames through the game. Returns the number of frames run."""
+    game.speech_worker.shutdown()
+    game.speech_worker = ReplayAI()
+    if start is not None:
+        game.current_state = start["state"]
+        apply_pet_state(game.pet, start["pet"])
+    game.sim_clock.reset()
+    game.drawn_state = None
+
+    count = 0
+    now = 0.0
+    for t, previous, events in frames:
+        # Optional empty frames in between, e.g. to exercise the renderer over a long session
+        if frame_step:
+            while now + frame_step < previous:
+                now += frame_step
+                game.run_frame([], now=now, draw=render)
+                count += 1
+        # Bring the pet up to the frame before, which is what the events were handled against
+        if previous > now:
+            game.run_frame([], now=previous, draw=render)
+            count += 1
+        now = t
+        count += 1
+        if not game.run_frame(events, now=now, draw=render):
+            break
+    return count
+
+
+def state_digest(state):
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a Pet Pal input log headless")
+    parser.add_argument("log", nargs="?", help="input log written with PETPAL_RECORD")
+    parser.add_argument("--synthetic-hours", type=float, help="replay a made-up session this long instead of a log")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic session")
+    parser.add_argument("--render", action="store_true", help="draw every frame (off by default)")
+    parser.add_argument("--frame-step", type=float, help="also run empty frames this many seconds apart")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times and check the results match")
+    parser.add_argument("--expect", help="exit with 1 unless the final state has this digest")
+    args = parser.parse_args()
+    if not args.log and not args.synthetic_hours:
+        parser.error("give an input log or --synthetic-hours")
+
+    digests = set()
+    for _ in range(args.repeat):
+        game, _ = load_game()
+        if args.log:
+            start, frames = read_input_log(args.log)
+        else:
+            start, frames = synthetic_session(args.synthetic_hours, button_clicks(game), args.seed)
+
+        began = time.perf_counter()
+        count = replay(game, start, frames, args.render, args.frame_step)
+        seconds = time.perf_counter() - began
+
+        state = pet_state(game.pet)
+        digest = state_digest(state)
+        digests.add(digest)
+        simulated = frames[-1][0] if frames else 0.0
+        print(f"Replayed {simulated / 3600:.2f} h ({count} frames, {game.speech_worker.calls} AI calls) "
+              f"in {seconds:.2f} s")
+        game.assets.shutdown()
+        game.save_game.close()
+
+    print(json.dumps({"screen": game.current_state, "pet": state, "digest": digest}, indent=2))
+    if len(digests) > 1:
+        print(f"Runs ended in {len(digests)} different states", file=sys.stderr)
+        sys.exit(1)
+    if args.expect and args.expect != digest:
+        print(f"Final state {digest} does not match {args.expect}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
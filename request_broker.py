@@ -0,0 +1,145 @@
+# request_broker.py
+import threading
+from concurrent.futures import Future
+
+
+class _Flight:
+    # One request on its way to the API, shared by every caller asking for the same key
+    __slots__ = ("future", "listeners")
+
+    def __init__(self):
+        self.future = Future()
+        self.listeners = []  # on_text callbacks of callers following a streamed reply
+
+
+class _Batch:
+    # Requests gathered during one window
+    __slots__ = ("items", "full")
+
+    def __init__(self):
+        self.items = []  # (message_args, flight)
+        self.full = threading.Event()  # Set once max_batch requests are in, to send without waiting out the window
+
+
+class RequestBroker:
+    """Sits in front of the OpenAI calls and cuts down on round trips.
+
+    Callers asking for the same key (mood, stats bucket, action) while a
+    request is already in flight wait for that request instead of sending
+    their own. Non-streamed requests arriving within `window` seconds of each
+    other are sent together as one batch_func call of up to max_batch prompts.
+    If batch_func raises ValueError (a reply it couldn't split up), each prompt
+    is sent again on its own with request_func.
+    Methods block until the reply is ready, so call them from worker threads.
+    """
+
+    def __init__(self, request_func, batch_func=None, stream_func=None, key_func=None, window=0.05, max_batch=8):
+        self.request_func = request_func  # (*message_args) -> text
+        self.batch_func = batch_func  # ([message_args, ...]) -> [text, ...]
+        self.stream_func = stream_func  # (*message_args, on_text=...) -> text
+        self.key_func = key_func or (lambda *message_args: message_args)
+        self.window = window
+        self.max_batch = max_batch
+        self.lock = threading.Lock()
+        self.in_flight = {}  # key -> _Flight
+        self.batch = _Batch()  # Requests waiting for the current window to close
+        self.round_trips = 0
+        self.coalesced = 0  # Callers served by someone else's request
+
+    def request(self, *message_args):
+        """Return the text for message_args, sharing or batching the API call where possible"""
+        key = self.key_func(*message_args)
+        with self.lock:
+            flight = self.in_flight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self.in_flight[key] = _Flight()
+                batch = self.batch
+                batch.items.append((message_args, flight))
+                # The first request of a window sends the whole batch when the window closes
+                leader = len(batch.items) == 1
+                if len(batch.items) >= self.max_batch:
+                    self.batch = _Batch()  # Full, the next request starts a new window
+                    batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self.lock:
+                if self.batch is batch:
+                    self.batch = _Batch()
+            self._send_batch(batch.items)
+        return flight.future.result()
+
+    def stream(self, *message_args, on_text=None):
+        """Like stream_func, but callers asking for a key that is already streaming follow that stream"""
+        key = self.key_func(*message_args)
+        with self.lock:
+            flight = self.in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[key] = _Flight()
+                self.round_trips += 1
+            else:
+                self.coalesced += 1
+            if on_text is not None:
+                flight.listeners.append(on_text)
+
+        if leader:
+            def notify(text):
+                # Keep streaming while anyone still wants the text
+                with self.lock:
+                    listeners = list(flight.listeners)
+                wanted = [listener(text) is not False for listener in listeners]
+                return any(wanted) or not listeners
+
+            self._run(key, flight, self.stream_func, *message_args, on_text=notify)
+        return flight.future.result()
+
+    def _send_batch(self, items):
+        if len(items) == 1 or self.batch_func is None:
+            for message_args, flight in items:
+                with self.lock:
+                    self.round_trips += 1
+                self._run(self.key_func(*message_args), flight, self.request_func, *message_args)
+            return
+
+        with self.lock:
+            self.round_trips += 1
+        try:
+            texts = self.batch_func([message_args for message_args, _ in items])
+            if len(texts) != len(items):
+                raise ValueError(f"asked for {len(items)} messages, got {len(texts)}")
+        except ValueError:
+            self._send_each(items)
+            return
+        except Exception as e:
+            texts = [e] * len(items)
+        for (message_args, flight), text in zip(items, texts):
+            self._finish(self.key_func(*message_args), flight, text)
+
+    def _send_each(self, items):
+        # One request_func call per item, side by side so nobody waits for the others' replies
+        with self.lock:
+            self.round_trips += len(items)
+        for message_args, flight in items:
+            key = self.key_func(*message_args)
+            threading.Thread(target=self._run, args=(key, flight, self.request_func, *message_args),
+                             daemon=True).start()
+
+    def _run(self, key, flight, func, *args, **kwargs):
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            result = e
+        self._finish(key, flight, result)
+
+    def _finish(self, key, flight, result):
+        with self.lock:
+            if self.in_flight.get(key) is flight:
+                del self.in_flight[key]
+        if isinstance(result, Exception):
+            flight.future.set_exception(result)
+        else:
+            flight.future.set_result(result)
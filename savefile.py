@@ -0,0 +1,227 @@
+# savefile.py
+import mmap
+import os
+import struct
+import threading
+import time
+from pet import Pet, MOODS
+
+# One fixed-width record per pet: name, time of the last change, the stats, mood code,
+# bubble timer, speech request id, max friendship flag, popup timer and bubble text.
+# Padded to 128 bytes so record i always starts at HEADER.size + i * RECORD.size.
+RECORD = struct.Struct("<16sddddbhI?b64s7x")
+HEADER = struct.Struct("<8sQ")  # Magic, number of records
+MAGIC = b"PETPAL\x00\x01"
+
+# Journal entries: pet index, action code, then the pet's full record after the action
+JOURNAL_ENTRY = struct.Struct("<IB3x" + RECORD.format[1:])
+JOURNAL_ACTIONS = ("save", "feed", "play", "sleep", "restart")
+
+
+def pack_pet(pet, updated_at):
+    return RECORD.pack(
+        pet.name.encode("utf-8")[:16],
+        updated_at,
+        pet.hunger,
+        pet.energy,
+        pet.happiness,
+        MOODS.index(pet.current_mood),
+        pet.speech_bubble_timer,
+        pet.speech_request_id,
+        pet.max_friendship_achieved,
+        pet.congrats_popup_timer,
+        # AI text is already filtered to single-byte characters
+        pet.speech_bubble_text.encode("latin-1", errors="replace")[:64],
+    )
+
+
+def unpack_pet(fields):
+    """Build a Pet from unpacked RECORD fields. Returns (pet, time of its last change)."""
+    (name, updated_at, hunger, energy, happiness, mood, bubble_timer, request_id,
+     max_friendship, popup_timer, text) = fields
+    pet = Pet(name.rstrip(b"\x00").decode("utf-8", errors="replace"))
+    pet.hunger, pet.energy, pet.happiness = hunger, energy, happiness
+    pet.current_mood = MOODS[mood]
+    pet.speech_bubble_timer = bubble_timer
+    pet.speech_request_id = request_id
+    pet.max_friendship_achieved = max_friendship
+    pet.congrats_popup_timer = popup_timer
+    pet.speech_bubble_text = text.rstrip(b"\x00").decode("latin-1")
+    return pet, updated_at
+
+
+class Snapshot:
+    """A saved snapshot, memory-mapped so opening it costs the same however many pets it holds.
+
+    Records are only decoded when a pet is asked for.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path} is not a Pet Pal save file")
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or len(self.data) < HEADER.size + self.count * RECORD.size:
+            self.data.close()
+            raise ValueError(f"{path} is not a Pet Pal save file")
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index):
+        offset = HEADER.size + index * RECORD.size
+        return self.data[offset:offset + RECORD.size]
+
+    def close(self):
+        self.data.close()
+
+
+def write_snapshot(path, count, get_record):
+    empty = bytes(RECORD.size)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, count))
+        for index in range(count):
+            f.write(get_record(index) or empty)
+
+
+class SaveGame:
+    """Snapshot file plus an append-only journal of pet changes.
+
+    record() appends one small entry to the journal, which is all a frame ever
+    pays for saving. Once the journal grows past compact_every entries it is
+    set aside and merged into a new snapshot on a background thread. The new
+    snapshot is swapped in on the caller's thread at the next record(),
+    compact() or close(), which also raise any error the merge ran into.
+    """
+
+    def __init__(self, path, compact_every=1000):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compacting_path = path + ".journal.old"  # Journal being merged, if compaction was interrupted
+        self.compact_every = compact_every
+        self.snapshot = self._open_snapshot()
+        self.latest = {}  # Index -> newest record of every pet changed since the snapshot was written
+        self.compactor = None
+        self.compact_error = None  # Set by the compactor thread, raised on the caller's
+
+        # Replay whatever the last run journaled after its snapshot
+        for journal_path in (self.compacting_path, self.journal_path):
+            self._replay(journal_path)
+        self.journal = open(self.journal_path, "ab")
+        self.journal_entries = os.path.getsize(self.journal_path) // JOURNAL_ENTRY.size
+
+    def __len__(self):
+        count = len(self.snapshot) if self.snapshot is not None else 0
+        if self.latest:
+            count = max(count, max(self.latest) + 1)
+        return count
+
+    def load(self, index):
+        """Return (pet, time of its last change), or None if there is no saved pet at index"""
+        record = self.latest.get(index)
+        if record is None and self.snapshot is not None and index < len(self.snapshot):
+            record = self.snapshot.record(index)
+        if record is None or not any(record):
+            return None
+        try:
+            return unpack_pet(RECORD.unpack(record))
+        except (IndexError, struct.error):
+            return None  # Damaged record (e.g. a mood code that doesn't exist): start that pet fresh
+
+    def record(self, index, pet, action="save"):
+        """Journal the pet's current state after an action"""
+        record = pack_pet(pet, time.time())
+        self.latest[index] = record
+        self.journal.write(JOURNAL_ENTRY.pack(index, JOURNAL_ACTIONS.index(action), *RECORD.unpack(record)))
+        self.journal.flush()
+        self.journal_entries += 1
+        self._finish_compaction()  # After journaling, so the entry is safe even if this raises
+        if self.journal_entries >= self.compact_every:
+            self.compact()
+
+    def compact(self, wait=False):
+        """Merge the journal into a new snapshot, in the background unless wait is set"""
+        if self.compactor is not None:
+            if self.compactor.is_alive() and not wait:
+                return
+            self._finish_compaction(wait=True)
+
+        # Swapping files is the only work done on the caller's thread
+        self.journal.close()
+        if not os.path.exists(self.compacting_path):
+            os.replace(self.journal_path, self.compacting_path)
+        self.journal = open(self.journal_path, "ab")
+        self.journal_entries = 0
+
+        self.compactor = threading.Thread(target=self._compact, args=(dict(self.latest), self.snapshot),
+                                          name="save-compactor", daemon=True)
+        self.compactor.start()
+        if wait:
+            self._finish_compaction(wait=True)
+
+    def close(self, pets=None):
+        """Save the given {index: pet} states and write everything into the snapshot"""
+        for index, pet in (pets or {}).items():
+            self.record(index, pet)
+        self.compact(wait=True)
+        self.journal.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+    def _open_snapshot(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            return Snapshot(self.path)
+        except (ValueError, struct.error, OSError):
+            # Empty, truncated or not a save at all: keep it for inspection and carry on
+            # with whatever the journal has, rather than refusing to start
+            bad_path = self.path + ".bad"
+            os.replace(self.path, bad_path)
+            print(f"Could not read {self.path}, moved it to {bad_path}")
+            return None
+
+    def _compact(self, latest, snapshot):
+        count = len(snapshot) if snapshot is not None else 0
+        if latest:
+            count = max(count, max(latest) + 1)
+
+        def get_record(index):
+            record = latest.get(index)
+            if record is None and snapshot is not None and index < len(snapshot):
+                record = snapshot.record(index)
+            return record
+
+        # Written next to the real file and swapped in later, so a crash never leaves a half-written save
+        try:
+            write_snapshot(self.path + ".tmp", count, get_record)
+        except Exception as error:
+            self.compact_error = error
+
+    def _finish_compaction(self, wait=False):
+        if self.compactor is None or (self.compactor.is_alive() and not wait):
+            return
+        self.compactor.join()
+        self.compactor = None
+        error, self.compact_error = self.compact_error, None
+        if error is not None:
+            # The set-aside journal is kept, so nothing is lost and the next compact() tries again
+            raise error
+
+        # The old file is unmapped first: Windows can't replace a file that is still mapped
+        if self.snapshot is not None:
+            self.snapshot.close()
+        os.replace(self.path + ".tmp", self.path)
+        os.remove(self.compacting_path)
+        self.snapshot = Snapshot(self.path)
+
+    def _replay(self, journal_path):
+        if not os.path.exists(journal_path):
+            return
+        with open(journal_path, "rb") as f:
+            data = f.read()
+        # A crash mid-write can leave a partial entry at the end; it is ignored
+        for offset in range(0, len(data) - JOURNAL_ENTRY.size + 1, JOURNAL_ENTRY.size):
+            fields = JOURNAL_ENTRY.unpack_from(data, offset)
+            self.latest[fields[0]] = RECORD.pack(*fields[2:])
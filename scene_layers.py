@@ -0,0 +1,36 @@
+# scene_layers.py
+
+
+class SceneLayers:
+    """Static parts of each screen, composed once into display-format surfaces.
+
+    Register a build function per layer; it is called with the screen size and
+    must return a converted surface. Layers are rebuilt only when the screen
+    size changes or they are explicitly invalidated.
+    """
+
+    def __init__(self):
+        self.builders = {}  # name -> build_func(size)
+        self.layers = {}  # name -> built surface
+        self.size = None
+
+    def register(self, name, build_func):
+        self.builders[name] = build_func
+        self.layers.pop(name, None)
+
+    def get(self, name, size):
+        if size != self.size:
+            # Window size changed, everything has to be recomposed
+            self.layers.clear()
+            self.size = size
+
+        layer = self.layers.get(name)
+        if layer is None:
+            layer = self.layers[name] = self.builders[name](size)
+        return layer
+
+    def invalidate(self, name=None):
+        if name is None:
+            self.layers.clear()
+        else:
+            self.layers.pop(name, None)
@@ -0,0 +1,107 @@
+# scheduler.py
+import heapq
+from pet import Pet, STAT_EPSILON
+
+
+class PetScheduler:
+    """Runs many pets but only touches a pet when something visible happens to it.
+
+    Between actions a pet's stats move in straight lines, so the tick of its
+    next mood change, max friendship or speech bubble expiry is known in
+    advance. Those ticks are kept in a heap; advance() jumps each pet straight
+    to its next event with Pet.advance_ticks() and skips the idle ticks in
+    between. Pets are brought up to date on demand when they are read or acted on.
+    """
+
+    def __init__(self, ai_message_func=None):
+        self.ai_message_func = ai_message_func
+        self.tick = 0
+        self.pets = {}  # pet_id -> [pet, tick the pet is up to date at, scheduled event tick]
+        self.events = []  # Heap of (event tick, pet_id); entries that no longer match the pet are skipped
+        self.next_id = 0
+
+    def add(self, pet=None):
+        if pet is None:
+            pet = Pet()
+        pet_id = self.next_id
+        self.next_id += 1
+        self.pets[pet_id] = [pet, self.tick, None]
+        self._schedule(pet_id)
+        return pet_id
+
+    def remove(self, pet_id):
+        del self.pets[pet_id]
+
+    def get(self, pet_id):
+        """Return the pet brought up to the current tick"""
+        self._sync(pet_id, self.tick)
+        return self.pets[pet_id][0]
+
+    def stats(self, pet_id):
+        """(pet, hunger, energy, happiness) at the current tick, without bringing the pet up to date.
+
+        Mood, speech and friendship only change at scheduled events, which
+        advance() has already handled, so the pet's other fields are current.
+        """
+        pet, synced_at, _ = self.pets[pet_id]
+        return (pet, *pet.stats_after(self.tick - synced_at))
+
+    def feed(self, pet_id):
+        self._act(pet_id, Pet.feed, "fed")
+
+    def play(self, pet_id):
+        self._act(pet_id, Pet.play, "played")
+
+    def sleep(self, pet_id):
+        self._act(pet_id, Pet.sleep, "slept")
+
+    def advance(self, ticks):
+        """Move time forward, handling every event on the way. Returns the ids of pets that had an event, in order."""
+        end = self.tick + ticks
+        touched = []
+        while self.events and self.events[0][0] <= end:
+            event_tick, pet_id = heapq.heappop(self.events)
+            entry = self.pets.get(pet_id)
+            if entry is None or entry[2] != event_tick:
+                continue  # Pet was removed or rescheduled since this was queued
+
+            self._sync(pet_id, event_tick)
+            touched.append(pet_id)
+            self._schedule(pet_id)
+        self.tick = end
+        return touched
+
+    def _act(self, pet_id, action, response):
+        self._sync(pet_id, self.tick)
+        pet = self.pets[pet_id][0]
+        action(pet)
+        pet.show_action_response(response, self.ai_message_func)
+        self._schedule(pet_id)
+
+    def _sync(self, pet_id, tick):
+        entry = self.pets[pet_id]
+        if tick > entry[1]:
+            entry[0].advance_ticks(tick - entry[1], self.ai_message_func)
+            entry[1] = tick
+
+    def _schedule(self, pet_id):
+        entry = self.pets[pet_id]
+        pet, now = entry[0], entry[1]
+
+        candidates = []
+        if pet.get_mood() != pet.current_mood:
+            candidates.append(1)  # An action changed the stats, the mood catches up on the next tick
+        else:
+            mood, ticks = pet.predict_next_mood()
+            if mood is not None:
+                candidates.append(ticks)
+        if pet.happiness >= 100 - STAT_EPSILON and not pet.max_friendship_achieved:
+            candidates.append(1)
+        if pet.speech_bubble_timer > 0:
+            candidates.append(pet.speech_bubble_timer)
+
+        if candidates:
+            entry[2] = now + min(candidates)
+            heapq.heappush(self.events, (entry[2], pet_id))
+        else:
+            entry[2] = None  # Nothing will ever happen until the next action
@@ -0,0 +1,212 @@
+# sharded.py
+# PetPopulation split across worker processes, with the pet arrays in shared memory.
+#
+#   python sharded.py --pets 1000000 --workers 8 --ticks 600    # throughput vs. a single process
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from population import PetPopulation, FIELDS
+
+ALIGNMENT = 64  # Each array starts on its own cache line
+WORKER_CHECK_INTERVAL = 0.1  # Seconds step() waits on the event queue between checks that every worker is alive
+CLOSE_TIMEOUT = 5.0  # Seconds close() gives a worker to exit before terminating it
+
+
+def shared_layout(count):
+    """Byte offset of every field's array in the shared block, and the block's total size"""
+    offsets = {}
+    size = 0
+    for name, dtype, _ in FIELDS:
+        offsets[name] = size
+        size += -(-count * np.dtype(dtype).itemsize // ALIGNMENT) * ALIGNMENT
+    return offsets, max(size, 1)
+
+
+def shared_arrays(buffer, count):
+    # Arrays that read and write the shared block directly, no copies
+    offsets, _ = shared_layout(count)
+    return {name: np.ndarray(count, dtype=dtype, buffer=buffer, offset=offsets[name]) for name, dtype, _ in FIELDS}
+
+
+def _run_shard(shm_name, count, start, stop, commands, events):
+    # Worker process: steps pets start..stop-1 whenever the coordinator says so
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        arrays = shared_arrays(shm.buf, count)
+        shard = PetPopulation(stop - start, {name: array[start:stop] for name, array in arrays.items()})
+        while True:
+            command = commands.recv()
+            if command is None:
+                break
+            first_tick, ticks = command
+            for tick in range(first_tick, first_tick + ticks):
+                mood_changed, reached = shard.update()
+                if len(mood_changed) or len(reached):
+                    events.put((tick, mood_changed + start, reached + start))
+            events.put(None)  # This shard has finished the step
+        del shard, arrays
+    finally:
+        shm.close()
+
+
+class ShardedPopulation:
+    """Many pets stepped in parallel by a pool of worker processes.
+
+    The pet arrays live in one multiprocessing.shared_memory block. Every worker
+    owns a contiguous shard and steps it with PetPopulation's rules, so results
+    are identical to a single PetPopulation. step() runs all shards in lockstep
+    and only returns once every shard is done; between steps the workers are
+    idle, so the coordinator (and a renderer) can read and change the arrays
+    directly: the hunger, energy, ... attributes are views of the shared block.
+    Mood changes and max friendship events come back over a queue.
+
+    Call close() when done (or use it as a context manager).
+    """
+
+    def __init__(self, count, workers=None):
+        self.count = count
+        self.tick = 0
+        workers = max(1, min(workers or os.cpu_count() or 1, count))
+
+        _, size = shared_layout(count)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.arrays = shared_arrays(self.shm.buf, count)
+        for name, _, initial in FIELDS:
+            self.arrays[name].fill(initial)
+            setattr(self, name, self.arrays[name])
+        # Actions and mood lookups from the coordinator use the same rules, on the same memory
+        self.population = PetPopulation(count, self.arrays)
+
+        # Spawned rather than forked: the game process has threads running
+        context = mp.get_context("spawn")
+        self.events = context.Queue()
+        self.commands = []
+        self.workers = []
+        # Shard edges on multiples of ALIGNMENT pets, so no two workers write the same cache line
+        bounds = np.linspace(0, count, workers + 1).astype(int) // ALIGNMENT * ALIGNMENT
+        bounds[-1] = count
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if start == stop:
+                continue
+            parent, child = context.Pipe()
+            worker = context.Process(target=_run_shard, name=f"pets-{start}-{stop}", daemon=True,
+                                     args=(self.shm.name, count, int(start), int(stop), child, self.events))
+            worker.start()
+            self.commands.append(parent)
+            self.workers.append(worker)
+
+    def step(self, ticks=1):
+        """Advance every pet by `ticks` ticks.
+
+        Returns [(tick, pets whose mood changed, pets that just hit max friendship), ...] for
+        every tick that had any, in tick order. Pets are given by index, in ascending order.
+        Raises RuntimeError if a worker has died; the population can then only be closed.
+        """
+        if ticks <= 0:
+            return []
+        self._check_workers()
+        for commands in self.commands:
+            commands.send((self.tick, ticks))
+
+        by_tick = {}
+        running = len(self.workers)
+        while running:
+            try:
+                event = self.events.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                self._check_workers()  # A dead worker would never report, don't wait for it forever
+                continue
+            if event is None:
+                running -= 1
+                continue
+            tick, mood_changed, reached = event
+            by_tick.setdefault(tick, []).append((mood_changed, reached))
+        self.tick += ticks
+
+        # Shards report in any order; sorting gives the same index order as PetPopulation.update()
+        return [
+            (tick,
+             np.sort(np.concatenate([mood_changed for mood_changed, _ in shards])),
+             np.sort(np.concatenate([reached for _, reached in shards])))
+            for tick, shards in sorted(by_tick.items())
+        ]
+
+    def feed(self, indices):
+        self.population.feed(indices)
+
+    def play(self, indices):
+        self.population.play(indices)
+
+    def sleep(self, indices):
+        self.population.sleep(indices)
+
+    def get_mood(self, out=None):
+        return self.population.get_mood(out)
+
+    def mood_name(self, index):
+        return self.population.mood_name(index)
+
+    def _check_workers(self):
+        for worker in self.workers:
+            if not worker.is_alive():
+                raise RuntimeError(f"worker {worker.name} exited with code {worker.exitcode}")
+
+    def close(self):
+        try:
+            for commands in self.commands:
+                try:
+                    commands.send(None)
+                except OSError:
+                    pass  # That worker has already exited
+            for worker in self.workers:
+                worker.join(CLOSE_TIMEOUT)
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+        finally:
+            self.commands, self.workers = [], []
+            self.arrays = self.population = None
+            for name, _, _ in FIELDS:
+                setattr(self, name, None)  # Drop the views so the block can be released
+            self.shm.close()
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded pet simulation throughput")
+    parser.add_argument("--pets", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--batch", type=int, default=60, help="ticks per lockstep step")
+    args = parser.parse_args()
+
+    single = PetPopulation(args.pets)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        single.update()
+    single_rate = args.pets * args.ticks / (time.perf_counter() - start)
+    print(f"1 process: {single_rate / 1e6:.1f} M pet-ticks/s")
+
+    with ShardedPopulation(args.pets, args.workers) as sharded:
+        sharded.step(1)  # Workers are up and have touched their shards
+        start = time.perf_counter()
+        for _ in range(args.ticks // args.batch):
+            sharded.step(args.batch)
+        ticks = args.ticks // args.batch * args.batch
+        sharded_rate = args.pets * ticks / (time.perf_counter() - start)
+        print(f"{len(sharded.workers)} workers: {sharded_rate / 1e6:.1f} M pet-ticks/s "
+              f"({sharded_rate / single_rate:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# sim_clock.py
+import math
+import time
+from pet import TICK_RATE
+
+
+class SimulationClock:
+    """Converts real elapsed time into whole simulation ticks.
+
+    Ticks are counted from the last reset, so the pet ages at the same speed
+    whatever the frame rate, and the same times always give the same ticks
+    however they are split into frames (which keeps replays exact). Leftover
+    fractions of a tick carry over to the next call.
+    """
+
+    def __init__(self, tick_rate=TICK_RATE, time_func=time.perf_counter):
+        self.tick_rate = tick_rate
+        self.time_func = time_func
+        self.start_time = None
+        self.ticks = 0  # Ticks handed out since start_time
+
+    def elapsed_ticks(self, now=None):
+        """Return how many ticks have passed since the previous call"""
+        if now is None:
+            now = self.time_func()
+        if self.start_time is None:
+            self.start_time = now
+            return 0
+
+        total = math.floor((now - self.start_time) * self.tick_rate)
+        ticks = max(0, total - self.ticks)  # Nothing if the clock went backwards
+        self.ticks += ticks
+        return ticks
+
+    def time_until(self, ticks, now=None):
+        """Seconds until elapsed_ticks() will have handed out `ticks` more ticks"""
+        if now is None:
+            now = self.time_func()
+        if self.start_time is None:
+            return 0.0
+        return max(0.0, self.start_time + (self.ticks + ticks) / self.tick_rate - now)
+
+    def reset(self):
+        """Start counting from the next call, e.g. when play starts"""
+        self.start_time = None
+        self.ticks = 0
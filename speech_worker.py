@@ -0,0 +1,162 @@
+# speech_worker.py
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class SpeechWorker:
+    """Generates AI speech on background threads so the game loop never waits on the network.
+
+    Pass a SpeechWorker anywhere Pet expects an ai_message_func. The pet shows its
+    static fallback text right away and poll() swaps in the AI text once it arrives.
+
+    With a stream_func (generate_func plus an on_text callback) replies are shown
+    as they stream in: the first chunk replaces the fallback text and restarts the
+    bubble timer, and the deadline only applies until that first chunk.
+
+    on_ready, if given, is called from the worker threads whenever something is
+    waiting for poll(), so a game loop that sleeps between frames can wake up.
+    """
+
+    def __init__(self, generate_func, timeout=5.0, max_workers=2, cache=None, stream_func=None, on_ready=None):
+        self.generate_func = generate_func
+        self.stream_func = stream_func
+        self.on_ready = on_ready
+        self.cache = cache  # Optional MessageCache checked before going to a thread
+        self.timeout = timeout  # Seconds before a reply is considered too late to show
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speech")
+        self.finished = queue.Queue()  # Filled by worker threads, drained on the main thread
+        self.pending = {}  # pet -> (request_id, future, deadline)
+        self.prefetched = {}  # pet -> (mood, future) for the mood the pet is about to switch to
+        self.partials = queue.Queue()  # (pet, request_id, text so far, first chunk?) from streaming replies
+        self.streaming = {}  # pet -> request_id whose reply has started showing
+
+    def submit(self, pet, request_id, mood, hunger, energy, happiness, recent_action=None):
+        # Only the newest bubble matters, so drop the previous request if it hasn't started yet
+        previous = self.pending.pop(pet, None)
+        if previous is not None:
+            previous[1].cancel()
+
+        # Mood change we saw coming: use the prefetched reply
+        prefetched = self.prefetched.pop(pet, None)
+        future = None
+        if prefetched is not None:
+            if recent_action is None and prefetched[0] == mood:
+                future = prefetched[1]
+            else:
+                prefetched[1].cancel()
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            pet.receive_speech(request_id, future.result())
+            return
+
+        # Cached replies are applied on the spot, no need for a round trip through the pool
+        if future is None and self.cache is not None:
+            text = self.cache.get(mood, hunger, energy, happiness, recent_action)
+            if text is not None:
+                pet.receive_speech(request_id, text)
+                return
+
+        deadline = time.monotonic() + self.timeout
+        if future is None or future.done():
+            if self.stream_func is not None:
+                future = self.executor.submit(self._stream, pet, request_id, deadline,
+                                              mood, hunger, energy, happiness, recent_action)
+            else:
+                future = self.executor.submit(self.generate_func, mood, hunger, energy, happiness, recent_action)
+        self.pending[pet] = (request_id, future, deadline)
+        future.add_done_callback(lambda done: self._ready(self.finished, (pet, request_id, deadline, done)))
+
+    def prefetch(self, pet, lead_ticks=600):
+        """Start generating speech for the pet's next mood change if it is less than lead_ticks away"""
+        mood, ticks = pet.predict_next_mood()
+        if mood is None or ticks > lead_ticks:
+            return
+
+        current = self.prefetched.get(pet)
+        if current is not None:
+            if current[0] == mood:
+                return  # Already on its way
+            current[1].cancel()
+
+        # Ask with the stats the pet will have when the mood flips
+        hunger, energy, happiness = pet.stats_after(ticks)
+        text = None
+        if self.cache is not None:
+            text = self.cache.get(mood, hunger, energy, happiness)
+        if text is not None:
+            future = Future()
+            future.set_result(text)
+        else:
+            future = self.executor.submit(self.generate_func, mood, hunger, energy, happiness, None)
+        self.prefetched[pet] = (mood, future)
+
+    def forget(self, pet):
+        """Drop everything queued for a pet that is no longer in play"""
+        for entry in (self.pending.pop(pet, None), self.prefetched.pop(pet, None)):
+            if entry is not None:
+                entry[1].cancel()
+        self.streaming.pop(pet, None)
+
+    def poll(self):
+        """Deliver finished replies to their pets. Call once per frame from the game loop."""
+        now = time.monotonic()
+        while True:
+            try:
+                pet, request_id, text, first = self.partials.get_nowait()
+            except queue.Empty:
+                break
+            if pet.receive_speech(request_id, text, restart_timer=first) and first:
+                self.streaming[pet] = request_id
+
+        while True:
+            try:
+                pet, request_id, deadline, future = self.finished.get_nowait()
+            except queue.Empty:
+                break
+
+            current = self.pending.get(pet)
+            if current is not None and current[0] == request_id:
+                del self.pending[pet]
+            streamed = self.streaming.get(pet) == request_id
+            if streamed:
+                del self.streaming[pet]
+
+            if future.cancelled() or future.exception() is not None:
+                continue
+            if now > deadline and not streamed:
+                continue  # Arrived too late, the fallback text stays
+
+            pet.receive_speech(request_id, future.result())
+
+        # Give up on requests that are still running past their deadline, unless they have started showing
+        for pet, (request_id, future, deadline) in list(self.pending.items()):
+            if now > deadline and self.streaming.get(pet) != request_id:
+                future.cancel()
+                del self.pending[pet]
+
+    def _stream(self, pet, request_id, deadline, *message_args):
+        # Runs on a worker thread; chunks are handed to poll() through self.partials
+        started = False
+
+        def on_text(text):
+            nonlocal started
+            if pet.speech_request_id != request_id:
+                return False  # A newer bubble has replaced this one
+            if not started and time.monotonic() > deadline:
+                return False  # Too late, the fallback text stays
+            self._ready(self.partials, (pet, request_id, text, not started))
+            started = True
+            return True
+
+        return self.stream_func(*message_args, on_text=on_text)
+
+    def _ready(self, target, item):
+        target.put(item)
+        on_ready = self.on_ready  # Read once: shutdown() may clear it from the main thread
+        if on_ready is not None:
+            on_ready()
+
+    def shutdown(self, wait=False):
+        """Stop taking requests. With wait=True, block until the replies already running have finished."""
+        self.on_ready = None  # Replies still in flight may finish after the caller has gone away
+        self.executor.shutdown(wait=wait, cancel_futures=True)
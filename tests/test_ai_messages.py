@@ -0,0 +1,53 @@
+# test_ai_messages.py
+import threading
+from types import SimpleNamespace
+import pytest
+import ai_messages
+from ai_health import AIHealth
+from request_broker import RequestBroker
+
+
+class PlainTextCompletions:
+    """A client that ignores the batch format and always answers with plain text"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][-1]["content"])
+        message = SimpleNamespace(content="Yum, thank you!")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    completions = PlainTextCompletions()
+    monkeypatch.setattr(ai_messages, "openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(ai_messages, "ai_health", AIHealth())
+    return completions
+
+
+def test_unusable_batch_reply_is_a_failed_call(completions):
+    with pytest.raises(ValueError):
+        ai_messages.request_ai_batch([("happy", 10.0, 80.0, 90.0, None), ("hungry", 90.0, 50.0, 50.0, "fed you")])
+    stats = ai_messages.ai_health.stats()
+    assert (stats["calls"], stats["failures"]) == (1, 1)
+
+
+def test_broker_falls_back_to_one_request_each(completions):
+    broker = RequestBroker(ai_messages.request_ai_message, ai_messages.request_ai_batch, window=1.0, max_batch=2)
+    replies = {}
+
+    def ask(mood):
+        replies[mood] = broker.request(mood, 50.0, 50.0, 50.0, None)
+
+    threads = [threading.Thread(target=ask, args=(mood,)) for mood in ("happy", "sad")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert replies == {"happy": "Yum, thank you!", "sad": "Yum, thank you!"}
+    assert len(completions.prompts) == 3  # The batch, then each prompt on its own
+    stats = ai_messages.ai_health.stats()
+    assert (stats["calls"], stats["failures"]) == (3, 1)
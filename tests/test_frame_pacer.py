@@ -0,0 +1,72 @@
+# test_frame_pacer.py
+import os
+import time
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from frame_pacer import FramePacer
+
+
+@pytest.fixture
+def pacer():
+    pygame.display.init()
+    pygame.display.set_mode((100, 100))
+    pygame.event.clear()
+    yield FramePacer(fps=100, idle_fps=10, background_fps=5, hidden_fps=4)
+    pygame.display.quit()
+
+
+def timed_wait(pacer, next_change=None):
+    start = time.perf_counter()
+    pacer.wait(next_change)
+    return time.perf_counter() - start
+
+
+def test_active_frames_run_at_full_rate(pacer):
+    pacer.frame_shown([pygame.Rect(0, 0, 10, 10)])
+    assert timed_wait(pacer) < 0.05
+
+
+def test_idle_frames_slow_down(pacer):
+    pacer.frame_shown([])
+    pacer.wait()
+    assert timed_wait(pacer) > 0.08
+
+
+def test_next_change_ends_idle_wait(pacer):
+    pacer.frame_shown([])
+    pacer.wait()
+    assert timed_wait(pacer, next_change=0.02) < 0.06
+
+
+def test_minimized_window_throttles_after_a_drawn_frame(pacer):
+    # The last frame before minimizing presented something; that must not keep the loop at full rate
+    pacer.frame_shown([pygame.Rect(0, 0, 10, 10)])
+    pygame.event.post(pygame.event.Event(pygame.WINDOWMINIMIZED))
+    pacer.get_events()
+    assert not pacer.visible
+    pacer.wait()
+    assert timed_wait(pacer) > 0.2
+
+    pygame.event.post(pygame.event.Event(pygame.WINDOWRESTORED))
+    pacer.get_events()
+    assert pacer.visible
+
+
+def test_input_ends_the_wait(pacer):
+    pacer.frame_shown([])
+    pacer.wait()
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_f))
+    assert timed_wait(pacer) < 0.05
+    assert [event.type for event in pacer.get_events()] == [pygame.KEYDOWN]
+
+
+def test_wake_events_are_not_handed_to_the_game(pacer):
+    pacer.wake()
+    assert pacer.get_events() == []
+
+
+def test_wake_after_display_closed_is_ignored(pacer):
+    pygame.display.quit()
+    pacer.wake()  # A late AI reply arriving while the game shuts down
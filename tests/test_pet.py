@@ -0,0 +1,86 @@
+# test_pet.py
+import random
+import pytest
+from pet import Pet, STAT_EPSILON
+
+# Everything advance_ticks() promises to leave exactly as update() would; stats only to within STAT_EPSILON
+COMPARED = ("current_mood", "speech_bubble_timer", "max_friendship_achieved", "congrats_popup_timer")
+STATS = ("hunger", "energy", "happiness")
+
+
+def snapshot(pet):
+    state = {field: getattr(pet, field) for field in COMPARED}
+    state.update({stat: pytest.approx(getattr(pet, stat), abs=STAT_EPSILON / 10) for stat in STATS})
+    return state
+
+
+def random_pet(rng):
+    pet = Pet()
+    for _ in range(rng.randint(0, 8)):
+        getattr(pet, rng.choice(("feed", "play", "sleep")))()
+    pet.update()
+    return pet
+
+
+def twins(pet):
+    copies = (Pet(), Pet())
+    for copy in copies:
+        for field in Pet.__slots__:
+            setattr(copy, field, getattr(pet, field))
+    return copies
+
+
+def test_hungry_flips_on_the_same_tick():
+    # Summing HUNGER_RATE tick by tick reaches 75.00000000000284 where the closed
+    # form lands on exactly 75.0; both must still turn hungry on the same tick
+    stepped, jumped = Pet(), Pet()
+    for pet in (stepped, jumped):
+        for _ in range(3):
+            pet.sleep()
+        pet.play()
+
+    for _ in range(2630):
+        stepped.update()
+    jumped.advance_ticks(2630)
+    assert snapshot(jumped) == snapshot(stepped)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_advance_ticks_matches_update(seed):
+    rng = random.Random(seed)
+    for _ in range(15):
+        stepped, jumped = twins(random_pet(rng))
+        for _ in range(rng.randint(1, 4)):
+            ticks = rng.choice((1, 2, rng.randint(3, 200), rng.randint(200, 8000)))
+            for _ in range(ticks):
+                stepped.update()
+            jumped.advance_ticks(ticks)
+            assert snapshot(jumped) == snapshot(stepped)
+
+            action = rng.choice(("feed", "play", "sleep", None))
+            if action is not None:
+                getattr(stepped, action)()
+                getattr(jumped, action)()
+
+
+def test_stats_after_matches_update():
+    pet = Pet()
+    pet.play()
+    expected = pet.stats_after(5000)
+    for _ in range(5000):
+        pet.update()
+    assert (pet.hunger, pet.energy, pet.happiness) == pytest.approx(expected, abs=STAT_EPSILON / 10)
+
+
+def test_predict_next_mood_is_the_tick_update_changes_it():
+    rng = random.Random(7)
+    for _ in range(100):
+        pet = random_pet(rng)
+        mood, ticks = pet.predict_next_mood()
+        if mood is None:
+            continue
+        for _ in range(ticks - 1):
+            pet.update()
+        assert pet.get_mood() != mood
+        pet.update()
+        assert pet.current_mood == mood
@@ -0,0 +1,40 @@
+# test_pet_client.py
+import socket
+import time
+import pytest
+from pet_client import PetClient
+
+
+@pytest.fixture
+def client_and_server():
+    listener = socket.create_server(("127.0.0.1", 0))
+    client = PetClient(f"127.0.0.1:{listener.getsockname()[1]}", "ann")
+    server, _ = listener.accept()
+    listener.close()
+    yield client, server
+    client.close()
+    server.close()
+
+
+def poll_until(client, done):
+    for _ in range(200):
+        connected = client.poll()
+        if done():
+            return connected
+        time.sleep(0.01)
+    pytest.fail("the client never caught up")
+
+
+def test_malformed_lines_are_skipped(client_and_server):
+    client, server = client_and_server
+    server.sendall(b'not json\n{"x": 1}\n[1, 2]\n{"s": {"h": 5, "m": "hungry"}}\n')
+    assert poll_until(client, lambda: client.pet.hunger == 5)
+    assert client.pet.current_mood == "hungry"
+    assert client.bad_lines == 3
+
+
+def test_poll_reports_the_server_going_away(client_and_server):
+    client, server = client_and_server
+    server.close()
+    assert poll_until(client, lambda: not client.connected) is False
+    client.send("feed")  # Dropped quietly, the game shows the disconnect instead
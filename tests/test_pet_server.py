@@ -0,0 +1,43 @@
+# test_pet_server.py
+import asyncio
+import json
+from pet_server import PetServer
+
+
+async def connect(port, player):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(json.dumps({"hello": player}).encode("utf-8") + b"\n")
+    await reader.readline()  # The pet's full state: the server has the player
+    return writer
+
+
+async def disconnect(writer):
+    writer.close()
+    await writer.wait_closed()
+    await asyncio.sleep(0.05)  # Let the server notice
+
+
+def test_pets_of_players_gone_longest_are_dropped():
+    server = PetServer(max_idle_pets=2)
+
+    async def run():
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            writers = {player: await connect(port, player) for player in ("ann", "bob", "cy", "dee")}
+            for player in ("ann", "bob", "cy"):
+                await disconnect(writers[player])
+            assert sorted(server.players) == ["bob", "cy", "dee"]
+
+            # Coming back keeps the pet; a second connection for the same player keeps it online
+            writers["bob"] = await connect(port, "bob")
+            second_dee = await connect(port, "dee")
+            await disconnect(writers["dee"])
+            assert list(server.idle) == ["cy"]
+            for writer in (writers["bob"], second_dee):
+                await disconnect(writer)
+
+    asyncio.run(run())
+    assert list(server.idle) == ["bob", "dee"]
+    assert sorted(server.players) == ["bob", "dee"]
+    assert len(server.scheduler.pets) == 2
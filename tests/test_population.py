@@ -0,0 +1,110 @@
+# test_population.py
+import random
+import numpy as np
+import pytest
+from pet import Pet, MOODS
+from population import PetPopulation, FIELDS
+
+ACTIONS = ("feed", "play", "sleep")
+
+
+def assert_same(population, pets):
+    assert population.hunger.tolist() == [pet.hunger for pet in pets]
+    assert population.energy.tolist() == [pet.energy for pet in pets]
+    assert population.happiness.tolist() == [pet.happiness for pet in pets]
+    assert population.current_mood.tolist() == [MOODS.index(pet.current_mood) for pet in pets]
+    assert population.speech_bubble_timer.tolist() == [pet.speech_bubble_timer for pet in pets]
+    assert population.max_friendship_achieved.tolist() == [pet.max_friendship_achieved for pet in pets]
+    assert population.congrats_popup_timer.tolist() == [pet.congrats_popup_timer for pet in pets]
+    assert population.get_mood().tolist() == [MOODS.index(pet.get_mood()) for pet in pets]
+
+
+def act(population, pets, action, indices):
+    getattr(population, action)(indices)
+    for index in indices:
+        getattr(pets[index], action)()
+
+
+def step(population, pets):
+    """One tick on both sides; checks the events update() reports against what the pets did"""
+    before = [(pet.current_mood, pet.max_friendship_achieved) for pet in pets]
+    mood_changed, reached = population.update()
+    for pet in pets:
+        pet.update()
+    assert mood_changed.tolist() == [i for i, pet in enumerate(pets) if pet.current_mood != before[i][0]]
+    assert reached.tolist() == [i for i, pet in enumerate(pets) if pet.max_friendship_achieved and not before[i][1]]
+    return mood_changed, reached
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_scalar_pets(seed):
+    rng = random.Random(seed)
+    count = 100
+    population = PetPopulation(count)
+    pets = [Pet() for _ in range(count)]
+
+    for _ in range(40):
+        for _ in range(rng.randint(0, 3)):
+            # Duplicate indices on purpose: each one is another action on that pet
+            indices = [rng.randrange(count) for _ in range(rng.randint(1, count))]
+            act(population, pets, rng.choice(ACTIONS), indices)
+        for _ in range(rng.choice((1, 5, 60, 300))):
+            step(population, pets)
+        assert_same(population, pets)
+
+
+def test_many_ticks():
+    population = PetPopulation(50)
+    pets = [Pet() for _ in range(50)]
+    act(population, pets, "play", list(range(0, 50, 2)))
+    act(population, pets, "feed", list(range(0, 50, 3)) * 2)
+    for _ in range(8000):
+        step(population, pets)
+    assert_same(population, pets)
+    assert set(population.current_mood.tolist()) == {MOODS.index("hungry")}
+
+
+def test_duplicate_indices_repeat_the_action():
+    population = PetPopulation(3)
+    pets = [Pet() for _ in range(3)]
+    act(population, pets, "feed", [1, 1, 1, 2])
+    assert population.hunger.tolist() == [50, 0, 30]
+    assert_same(population, pets)
+
+
+def test_happiness_caps_at_101_and_sets_max_friendship_once():
+    population = PetPopulation(2)
+    pets = [Pet() for _ in range(2)]
+    act(population, pets, "play", [0, 0, 0, 0])
+    assert population.happiness[0] == 101
+    assert_same(population, pets)
+
+    mood_changed, reached = step(population, pets)
+    assert reached.tolist() == [0]
+    assert population.congrats_popup_timer.tolist() == [1, 0]
+
+    act(population, pets, "play", [0])  # Back over 100: already flagged, not reported again
+    _, reached = step(population, pets)
+    assert len(reached) == 0
+    assert_same(population, pets)
+
+
+def test_mood_change_starts_bubble_timer():
+    population = PetPopulation(1)
+    pets = [Pet()]
+    act(population, pets, "sleep", [0, 0])
+    act(population, pets, "play", [0, 0])
+    act(population, pets, "feed", [0])
+    mood_changed, _ = step(population, pets)
+    assert mood_changed.tolist() == [0]
+    assert population.mood_name(0) == "excited"
+    assert population.speech_bubble_timer[0] == pets[0].speech_bubble_timer > 0
+    assert_same(population, pets)
+
+
+def test_existing_arrays_are_used_in_place():
+    arrays = {name: np.full(4, initial, dtype=dtype) for name, dtype, initial in FIELDS}
+    population = PetPopulation(4, arrays)
+    population.feed([2])
+    population.update()
+    assert arrays["hunger"][2] == population.hunger[2] == 30.01
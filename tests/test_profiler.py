@@ -0,0 +1,22 @@
+# test_profiler.py
+import pytest
+from profiler import FrameProfiler
+
+
+def record_frame(profiler):
+    profiler.begin_frame()
+    profiler.mark("update")
+    profiler.end_frame()
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_hiding_the_overlay_restores_startup_recording(enabled):
+    profiler = FrameProfiler(enabled=enabled)
+    profiler.toggle_overlay()
+    assert profiler.enabled
+    record_frame(profiler)
+
+    profiler.toggle_overlay()
+    assert profiler.enabled == enabled
+    record_frame(profiler)
+    assert len(profiler.frames) == (2 if enabled else 1)
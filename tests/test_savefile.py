@@ -0,0 +1,113 @@
+# test_savefile.py
+import os
+import struct
+import pytest
+from pet import Pet
+from savefile import SaveGame, HEADER, MAGIC, RECORD, pack_pet
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "petpal.sav")
+
+
+def saved_pet(hunger):
+    pet = Pet()
+    pet.hunger = hunger
+    return pet
+
+
+def test_round_trip(path):
+    save = SaveGame(path)
+    save.record(0, saved_pet(12.5), "feed")
+    save.close({1: saved_pet(70.0)})
+
+    save = SaveGame(path)
+    assert save.load(0)[0].hunger == 12.5
+    assert save.load(1)[0].hunger == 70.0
+    assert save.load(2) is None
+    save.close()
+
+
+def test_journal_is_replayed_without_close(path):
+    save = SaveGame(path)
+    save.record(0, saved_pet(33.0), "feed")
+    save.journal.close()  # As if the game crashed
+
+    assert SaveGame(path).load(0)[0].hunger == 33.0
+
+
+@pytest.mark.parametrize("contents", [
+    b"",  # Empty
+    MAGIC[:5],  # Shorter than the header
+    HEADER.pack(MAGIC, 3) + bytes(RECORD.size),  # Says 3 pets, holds 1
+    b"<html>not a save file</html>" * 10,
+])
+def test_damaged_snapshot_is_set_aside(path, contents):
+    with open(path, "wb") as f:
+        f.write(contents)
+
+    save = SaveGame(path)
+    assert save.load(0) is None
+    assert os.path.exists(path + ".bad")
+
+    # The game carries on saving as normal
+    save.close({0: saved_pet(20.0)})
+    assert SaveGame(path).load(0)[0].hunger == 20.0
+
+
+def test_damaged_snapshot_falls_back_to_journal(path):
+    save = SaveGame(path)
+    save.record(0, saved_pet(44.0), "feed")
+    save.journal.close()
+    with open(path, "wb") as f:
+        f.write(b"")
+
+    assert SaveGame(path).load(0)[0].hunger == 44.0
+
+
+def test_damaged_record_loads_as_no_pet(path):
+    record = bytearray(pack_pet(Pet(), 0.0))
+    record[struct.calcsize("<16sdddd")] = 99  # Mood code (after name, time and stats) past the end of MOODS
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 1) + bytes(record))
+
+    assert SaveGame(path).load(0) is None
+
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_compaction_closes_the_old_snapshot(path):
+    save = SaveGame(path, compact_every=5)
+    save.close({0: saved_pet(1.0)})
+    save = SaveGame(path, compact_every=5)
+    first = save.snapshot
+    before = open_fds()
+    for i in range(200):
+        save.record(0, saved_pet(float(i)))
+        save.compact(wait=True)
+    assert first.data.closed
+    assert open_fds() <= before
+    save.close()
+    assert SaveGame(path).load(0)[0].hunger == 199.0
+
+
+def test_compaction_errors_are_raised_and_nothing_is_lost(path, monkeypatch):
+    import savefile
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    save = SaveGame(path)
+    save.record(0, saved_pet(5.0))
+    monkeypatch.setattr(savefile, "write_snapshot", fail)
+    with pytest.raises(OSError, match="disk full"):
+        save.compact(wait=True)
+
+    save.record(0, saved_pet(6.0))
+    monkeypatch.undo()
+    save.close()
+    assert SaveGame(path).load(0)[0].hunger == 6.0
@@ -0,0 +1,36 @@
+# test_sharded.py
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from population import PetPopulation
+from sharded import ShardedPopulation
+
+
+def test_matches_single_population():
+    single = PetPopulation(200)
+    with ShardedPopulation(200, workers=2) as sharded:
+        for population in (single, sharded):
+            population.feed(np.arange(0, 200, 3))
+            population.play(np.arange(0, 200, 7))
+        events = sharded.step(500)
+        expected = []
+        for tick in range(500):
+            mood_changed, reached = single.update()
+            if len(mood_changed) or len(reached):
+                expected.append((tick, mood_changed.tolist(), reached.tolist()))
+        assert [(tick, changed.tolist(), reached.tolist()) for tick, changed, reached in events] == expected
+        assert sharded.hunger.tolist() == single.hunger.tolist()
+
+
+def test_dead_worker_is_reported_and_memory_released():
+    sharded = ShardedPopulation(200, workers=2)
+    name = sharded.shm.name
+    sharded.step(1)
+    sharded.workers[0].kill()
+    sharded.workers[0].join()
+
+    with pytest.raises(RuntimeError, match="exited with code"):
+        sharded.step(1)
+    sharded.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
@@ -0,0 +1,57 @@
+# test_speech_worker.py
+import threading
+from pet import Pet
+from speech_worker import SpeechWorker
+
+
+def wait_for(event):
+    assert event.wait(5)
+
+
+def test_reply_reaches_pet_and_calls_on_ready():
+    ready = threading.Event()
+    worker = SpeechWorker(lambda *args: "Hi from the AI", on_ready=ready.set)
+    pet = Pet()
+    pet.show_speech_bubble("happy", worker)
+    wait_for(ready)
+    worker.poll()
+    assert pet.speech_bubble_text == "Hi from the AI"
+    worker.shutdown()
+
+
+def test_no_on_ready_after_shutdown():
+    release = threading.Event()
+    finished = threading.Event()
+    calls = []
+
+    def slow_reply(*args):
+        release.wait(5)
+        return "Too late"
+
+    worker = SpeechWorker(slow_reply, on_ready=lambda: calls.append(1))
+    pet = Pet()
+    pet.show_speech_bubble("happy", worker)
+    future = worker.pending[pet][1]
+    future.add_done_callback(lambda done: finished.set())
+
+    worker.shutdown()  # The game closes while the request is still running
+    release.set()
+    wait_for(finished)
+    assert calls == []
+
+
+def test_shutdown_can_wait_for_running_replies():
+    started = threading.Event()
+    finished = []
+
+    def slow_reply(*args):
+        started.set()
+        threading.Event().wait(0.2)
+        finished.append(1)
+        return "Done"
+
+    worker = SpeechWorker(slow_reply)
+    Pet().show_speech_bubble("happy", worker)
+    wait_for(started)
+    worker.shutdown(wait=True)
+    assert finished == [1]
@@ -0,0 +1,80 @@
+# test_streaming.py
+# Streamed speech end to end: SpeechWorker -> ai_messages -> OpenAI client -> fake_openai_server
+import threading
+import pytest
+import ai_messages
+import fake_openai_server
+from ai_health import AIHealth
+from message_cache import MessageCache
+from pet import Pet, BUBBLE_TICKS, MOOD_MESSAGES
+from speech_worker import SpeechWorker
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """A local completions server the real OpenAI client talks to, with a fresh cache and health tracker"""
+    server = fake_openai_server.serve(0, first_token_delay=0.05, per_token_delay=0.1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    monkeypatch.setattr(ai_messages, "openai_client", None)  # Created again with the new base URL
+    monkeypatch.setattr(ai_messages, "message_cache", MessageCache())
+    monkeypatch.setattr(ai_messages, "ai_health", AIHealth(budget=5.0))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def worker(stand_in):
+    ready = threading.Event()
+    worker = SpeechWorker(ai_messages.generate_ai_message, timeout=5.0, cache=ai_messages.message_cache,
+                          stream_func=ai_messages.generate_streamed_ai_message, on_ready=ready.set)
+    worker.ready = ready
+    yield worker
+    worker.shutdown(wait=True)
+
+
+def poll_until(worker, pet, done):
+    """Poll like the game loop does until done() holds; returns each bubble text seen on the way"""
+    seen = []
+    for _ in range(500):
+        if done():
+            return seen
+        worker.ready.wait(0.01)
+        worker.ready.clear()
+        worker.poll()
+        seen.append(pet.speech_bubble_text)
+    pytest.fail("timed out waiting for the reply")
+
+
+def test_partial_text_is_shown_and_restarts_the_bubble(worker):
+    pet = Pet()
+    pet.show_speech_bubble("happy", worker)
+    assert pet.speech_bubble_text == MOOD_MESSAGES["happy"]
+    pet.speech_bubble_timer = 1  # As if the fallback text had nearly run out while waiting
+
+    seen = poll_until(worker, pet, lambda: pet.speech_bubble_text != MOOD_MESSAGES["happy"])
+    assert fake_openai_server.REPLY.startswith(pet.speech_bubble_text)
+    assert pet.speech_bubble_text != fake_openai_server.REPLY  # Only the first chunk so far
+    assert pet.speech_bubble_timer == BUBBLE_TICKS
+
+    seen += poll_until(worker, pet, lambda: pet not in worker.pending)
+    assert pet.speech_bubble_text == fake_openai_server.REPLY
+    partials = [text for text in seen if text not in (MOOD_MESSAGES["happy"], fake_openai_server.REPLY)]
+    assert partials and all(fake_openai_server.REPLY.startswith(text) for text in partials)
+
+
+def test_replaced_bubble_abandons_its_stream(worker):
+    pet = Pet()
+    pet.show_speech_bubble("happy", worker)
+    future = worker.pending[pet][1]
+    poll_until(worker, pet, lambda: pet.speech_bubble_text != MOOD_MESSAGES["happy"])
+
+    pet.show_speech_bubble("sad")  # A new bubble replaces the one still streaming
+    # The stream stops at its next chunk and falls back to the static text, which is not cached
+    assert future.result(timeout=5) == MOOD_MESSAGES["happy"]
+    assert len(ai_messages.message_cache.entries) == 0
+
+    worker.poll()
+    assert pet.speech_bubble_text == MOOD_MESSAGES["sad"]
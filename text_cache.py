@@ -0,0 +1,77 @@
+# text_cache.py
+from collections import OrderedDict
+
+
+class TextCache:
+    """Keeps rendered text surfaces around so unchanged text isn't re-rendered every frame.
+
+    Entries are keyed on (font, text, color) for single lines and on
+    (font, text, color, wrap width) for word-wrapped blocks. The least recently
+    used entries are evicted once the cached pixels go over max_bytes.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size in bytes)
+        self.total_bytes = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry[0]
+
+        surface = font.render(text, True, color)
+        self._store(key, surface, _surface_bytes(surface))
+        return surface
+
+    def wrap(self, font, text, color, width):
+        """Word-wrap text to fit within width pixels and return the rendered line surfaces"""
+        key = (font, text, color, width)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry[0]
+
+        lines = [font.render(line, True, color) for line in wrap_lines(font, text, width)]
+        self._store(key, lines, sum(_surface_bytes(line) for line in lines))
+        return lines
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def _store(self, key, value, size):
+        self.entries[key] = (value, size)
+        self.total_bytes += size
+        # Evict least recently used text, but always keep the entry just added
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+
+def wrap_lines(font, text, width):
+    # Simple word wrapping for longer AI messages
+    text_lines = []
+    current_line = ""
+
+    for word in text.split(' '):
+        test_line = current_line + word + " "
+        if font.size(test_line)[0] > width:
+            if current_line:
+                text_lines.append(current_line.strip())
+                current_line = word + " "
+            else:
+                text_lines.append(word)
+                current_line = ""
+        else:
+            current_line = test_line
+
+    if current_line:
+        text_lines.append(current_line.strip())
+    return text_lines
+
+
+def _surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()